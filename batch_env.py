@@ -0,0 +1,447 @@
+"""batch_env.py: Step many Tileworld instances at once with NumPy.
+
+Every board lives in a slice of the batch arrays, indexed [env, x, y] like the
+(x, y) locations used by the agents. One call to `BatchEnv.step` plays one frame of
+`env.step_world` for all boards: spawn, moves, coin expiry, pickups, coins spawned
+on walls, and the collision penalty.
+
+A `GameState` is a copyable snapshot of one world in the middle of a frame, taken
+from the sprite engine with `GameState.capture`. `BatchEnv.from_state` forks it
+into many boards, which makes the batch a cheap forward model for planners.
+"""
+
+import argparse
+import dataclasses
+import random
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+import env
+import worldgen
+
+# Action codes, matching the directions drawn by `randPlayer`.
+LEFT, RIGHT, UP, DOWN, STAY = range(5)
+ACTION_DELTAS = np.array([(-1, 0), (1, 0), (0, -1), (0, 1), (0, 0)])
+
+COLLISION_PENALTY = 100
+
+
+@dataclass(frozen=True)
+class GameState:
+    """Snapshot of one world in frame `tick`.
+
+    Coins are rows of (x, y, value, last tick alive) and `schedule` holds the next
+    coins to spawn as rows of (x, y, value, lifespan in seconds). `pos` and `scores`
+    have one row per agent in scoring order. `spawned` is set once the frame has
+    spawned its coin.
+    """
+
+    seed: int
+    tick: int
+    expire_ticks: int  # ticks per second of coin lifespan
+    walls: np.ndarray
+    pos: np.ndarray
+    scores: np.ndarray
+    coins: np.ndarray
+    schedule: np.ndarray
+    spawned: bool = True
+
+    @property
+    def n(self) -> int:
+        """Return the board size."""
+        return len(self.walls)
+
+    @classmethod
+    def capture(cls, world: env.Environment, spawns: int = 256) -> "GameState":
+        """Take a snapshot of `world` with the next `spawns` coins of its schedule.
+
+        Taken during an agent's `update()`, the agents before it have already
+        moved this frame and the others have not.
+        """
+        tick_ms = world.config.tick_ms
+        coins = [
+            (*coin.cell, coin.value, coin.expires_at // tick_ms) for coin in world.coins
+        ]
+        return cls(
+            seed=world.seed,
+            tick=world.get_ticks() // tick_ms,
+            expire_ticks=1000 // tick_ms,
+            walls=world.wall_grid.blocked.copy(),
+            pos=world.agent_cells.copy(),
+            scores=np.array([agent.score for agent in world.agents], dtype=int),
+            coins=np.array(coins, dtype=int).reshape(-1, 4),
+            schedule=world.coin_queue.upcoming(spawns).astype(int),
+        )
+
+    def copy(self) -> "GameState":
+        """Return a snapshot that shares no arrays with this one."""
+        return dataclasses.replace(
+            self,
+            **{
+                field.name: getattr(self, field.name).copy()
+                for field in dataclasses.fields(self)
+                if isinstance(getattr(self, field.name), np.ndarray)
+            },
+        )
+
+    def step(self, actions) -> "GameState":
+        """Return the snapshot one frame later, after one action per agent.
+
+        The first step finishes the frame the snapshot was taken in.
+        """
+        batch = BatchEnv.from_state(self, 1)
+        batch.step(np.asarray(actions).reshape(1, -1))
+        return batch.state(0)
+
+
+class BatchEnv:
+    """A batch of independent Tileworld boards stepped in lock-step.
+
+    State is held in NumPy arrays:
+      - `walls` (num_envs, N, N): boolean wall mask.
+      - `coin_value` (num_envs, N, N): total value of the live coins on a cell.
+      - `coin_count` (num_envs, N, N): number of live coins on a cell.
+      - `coin_life` (num_envs, N, N): ticks until the last coin on a cell expires.
+      - `pos` (num_envs, num_agents, 2) and `scores` (num_envs, num_agents).
+
+    Several coins can share a cell and expire separately, so each coin has a slot
+    in a per-coin ledger (`coin_x`, `coin_y`, `coin_val`, `coin_expire`,
+    `coin_alive`, each shaped (num_envs, slots)). The grids are updated only for
+    the coins that spawn or go, and coins are expired from `expiring`, which files
+    every coin under the tick it expires after, so a frame only touches the coins
+    it spawns, expires or hands out instead of the whole ledger.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        seeds,
+        starts=None,
+        num_agents: int = 2,
+        n: int = env.N,
+        wallnum: int = env.WALLNUM,
+        coinnum: int = env.COINNUM,
+    ):
+        """Generate one board per seed, with agents at `starts` (default (0, 0))."""
+        self.seeds = np.asarray(seeds)
+        self.num_envs = len(self.seeds)
+        self.num_agents = num_agents
+        self.n = n
+        self.expire_ticks = 1000 // env.TICK_MS  # lifespan ticks per coin second
+
+        self.walls = np.zeros((self.num_envs, n, n), dtype=bool)
+        coord_type = np.int8 if n < 128 else np.int16
+        self.schedule = np.empty((self.num_envs, coinnum, 4), dtype=coord_type)
+        for idx, seed in enumerate(self.seeds):
+            wall_pos = worldgen.wall_positions(seed, n, wallnum)
+            self.walls[idx, wall_pos[:, 0], wall_pos[:, 1]] = True
+            self.schedule[idx] = worldgen.coin_schedule(seed, n, coinnum)
+
+        if starts is None:
+            starts = np.zeros((self.num_envs, num_agents, 2), dtype=int)
+        self.starts = np.array(starts, dtype=int).reshape(self.num_envs, num_agents, 2)
+        self.reset()
+
+    def reset(self):
+        """Start every board again from tick 0 with an empty coin ledger."""
+        slots = 2 * self.n
+        self.tick = 0
+        self.skip_spawn = False
+        self.cursor = np.zeros(self.num_envs, dtype=int)
+        self.pos = self.starts.copy()
+        self.scores = np.zeros((self.num_envs, self.num_agents), dtype=int)
+        self.coin_x = np.zeros((self.num_envs, slots), dtype=int)
+        self.coin_y = np.zeros((self.num_envs, slots), dtype=int)
+        self.coin_val = np.zeros((self.num_envs, slots), dtype=int)
+        self.coin_expire = np.zeros((self.num_envs, slots), dtype=int)
+        self.coin_alive = np.zeros((self.num_envs, slots), dtype=bool)
+        self.live = np.zeros(self.num_envs, dtype=int)
+        self.coin_value = np.zeros((self.num_envs, self.n, self.n), dtype=int)
+        self.coin_count = np.zeros((self.num_envs, self.n, self.n), dtype=int)
+        self.coin_deadline = np.zeros((self.num_envs, self.n, self.n), dtype=int)
+        # expiry tick -> (envs, slots) of the coins spawned to expire after it
+        self.expiring: dict[int, list[tuple[np.ndarray, np.ndarray]]] = {}
+        self.wall_coins: list[tuple[np.ndarray, np.ndarray]] = []
+
+    @property
+    def coin_life(self) -> np.ndarray:
+        """Return the ticks until the last coin on each cell expires (0: no coin)."""
+        return np.where(self.coin_count > 0, self.coin_deadline - self.tick, 0)
+
+    @classmethod
+    def from_state(cls, state: GameState, copies: int) -> "BatchEnv":
+        """Return a batch of `copies` boards that all continue from `state`.
+
+        The first `step` finishes the snapshot's frame, so it only spawns a coin if
+        the snapshot has not, and agents that already moved this frame should STAY.
+        """
+        batch = cls.__new__(cls)
+        batch.seeds = np.full(copies, state.seed)
+        batch.num_envs = copies
+        batch.num_agents = len(state.pos)
+        batch.n = state.n
+        batch.expire_ticks = state.expire_ticks
+        batch.walls = np.broadcast_to(state.walls, (copies, *state.walls.shape))
+        batch.schedule = np.broadcast_to(
+            state.schedule, (copies, *state.schedule.shape)
+        )
+        batch.starts = np.broadcast_to(state.pos, (copies, *state.pos.shape))
+        batch.reset()
+        batch.tick = state.tick - 1
+        batch.skip_spawn = state.spawned
+        batch.scores[:] = state.scores
+
+        while batch.coin_alive.shape[1] < len(state.coins):
+            batch._grow_slots()
+        envs = np.repeat(np.arange(copies), len(state.coins))
+        slots = np.tile(np.arange(len(state.coins)), copies)
+        batch._place(envs, slots, np.tile(state.coins, (copies, 1)))
+        return batch
+
+    def state(self, idx: int) -> GameState:
+        """Return a snapshot of board `idx` at the end of the current frame."""
+        slots = np.flatnonzero(self.coin_alive[idx])
+        coins = np.stack(
+            [
+                self.coin_x[idx, slots],
+                self.coin_y[idx, slots],
+                self.coin_val[idx, slots],
+                self.coin_expire[idx, slots],
+            ],
+            axis=1,
+        )
+        return GameState(
+            seed=int(self.seeds[idx]),
+            tick=self.tick + 1,
+            expire_ticks=self.expire_ticks,
+            walls=self.walls[idx].copy(),
+            pos=self.pos[idx].copy(),
+            scores=self.scores[idx].copy(),
+            coins=coins,
+            schedule=self.schedule[idx, self.cursor[idx] :].astype(int),
+            spawned=False,
+        )
+
+    def _grow_slots(self):
+        """Double the coin ledger when a board runs out of free slots."""
+        for name in ("coin_x", "coin_y", "coin_val", "coin_expire", "coin_alive"):
+            column = getattr(self, name)
+            setattr(self, name, np.concatenate((column, np.zeros_like(column)), 1))
+
+    def _spawn(self, mask: np.ndarray):
+        """Spawn the next scheduled coin on every board selected by `mask`."""
+        envs = np.flatnonzero(mask)
+        if not envs.size:
+            return
+        free = ~self.coin_alive[envs]
+        if not free.any(axis=1).all():
+            self._grow_slots()
+            free = ~self.coin_alive[envs]
+        slots = free.argmax(axis=1)
+
+        rows = self.schedule[envs, self.cursor[envs]].astype(int)
+        self.cursor[envs] += 1
+        rows[:, 3] = self.tick + rows[:, 3] * self.expire_ticks
+        self._place(envs, slots, rows)
+
+    def _place(self, envs: np.ndarray, slots: np.ndarray, rows: np.ndarray):
+        """Put coins of (x, y, value, last tick alive) `rows` in free (envs, slots)."""
+        expire = rows[:, 3]
+        self.coin_x[envs, slots] = rows[:, 0]
+        self.coin_y[envs, slots] = rows[:, 1]
+        self.coin_val[envs, slots] = rows[:, 2]
+        self.coin_expire[envs, slots] = expire
+        self.coin_alive[envs, slots] = True
+        np.add.at(self.live, envs, 1)
+
+        cells = (envs, rows[:, 0], rows[:, 1])
+        np.add.at(self.coin_value, cells, rows[:, 2])
+        np.add.at(self.coin_count, cells, 1)
+        np.maximum.at(self.coin_deadline, cells, expire)
+        for due in np.unique(expire).tolist():
+            spawned = expire == due
+            self.expiring.setdefault(due, []).append((envs[spawned], slots[spawned]))
+        on_wall = self.walls[cells]
+        if on_wall.any():
+            self.wall_coins.append((envs[on_wall], slots[on_wall]))
+
+    def _remove(self, envs: np.ndarray, slots: np.ndarray):
+        """Take the live coins in distinct (envs, slots) off the ledger and grids.
+
+        Coins only go when every coin on their cell goes too (a pickup or a wall) or
+        when they expire, and a cell's coins expire in order, so a cell's deadline
+        is the latest expiry among its coins until the cell is empty.
+        """
+        cells = (envs, self.coin_x[envs, slots], self.coin_y[envs, slots])
+        self.coin_alive[envs, slots] = False
+        self.live -= np.bincount(envs, minlength=self.num_envs)
+        np.subtract.at(self.coin_value, cells, self.coin_val[envs, slots])
+        np.subtract.at(self.coin_count, cells, 1)
+        emptied = self.coin_count[cells] == 0
+        self.coin_deadline[envs[emptied], cells[1][emptied], cells[2][emptied]] = 0
+
+    def _pop(self, entries) -> tuple[np.ndarray, np.ndarray]:
+        """Return the distinct (envs, slots) of `entries` that still hold a coin."""
+        envs = np.concatenate([entry[0] for entry in entries])
+        slots = np.concatenate([entry[1] for entry in entries])
+        keys = np.unique(envs * self.coin_alive.shape[1] + slots)
+        envs, slots = np.divmod(keys, self.coin_alive.shape[1])
+        alive = self.coin_alive[envs, slots]
+        return envs[alive], slots[alive]
+
+    def _expire(self):
+        """Expire the coins whose expiry tick has just passed."""
+        entries = self.expiring.pop(self.tick - 1, None)
+        if not entries:
+            return
+        envs, slots = self._pop(entries)
+        # a slot may have been freed and refilled since it was filed
+        due = self.coin_expire[envs, slots] < self.tick
+        if due.any():
+            self._remove(envs[due], slots[due])
+
+    def step(self, actions) -> np.ndarray:
+        """Play one frame with `actions` (num_envs, num_agents); return score deltas."""
+        actions = np.asarray(actions).reshape(self.num_envs, self.num_agents)
+        envs = np.arange(self.num_envs)
+        before = self.scores.copy()
+        self.tick += 1
+
+        # spawn a coin while fewer than N are on the board
+        if not self.skip_spawn:
+            self._spawn(self.live < self.n)
+        self.skip_spawn = False
+
+        # moves are undone when they hit a wall or leave the board
+        target = self.pos + ACTION_DELTAS[actions]
+        inside = ((target >= 0) & (target < self.n)).all(axis=2)
+        clipped = np.clip(target, 0, self.n - 1)
+        blocked = self.walls[envs[:, None], clipped[..., 0], clipped[..., 1]]
+        self.pos = np.where((inside & ~blocked)[..., None], target, self.pos)
+
+        # coins expire after the agents moved, before anything is collected
+        self._expire()
+
+        # pickups go to agents in order, like the two spritecollide calls
+        for agent in range(self.num_agents):
+            x, y = self.pos[:, agent, 0], self.pos[:, agent, 1]
+            hit_envs = np.flatnonzero(self.coin_count[envs, x, y])
+            if not hit_envs.size:
+                continue
+            self.scores[hit_envs, agent] += self.coin_value[
+                hit_envs, x[hit_envs], y[hit_envs]
+            ]
+            hit = (
+                self.coin_alive[hit_envs]
+                & (self.coin_x[hit_envs] == x[hit_envs, None])
+                & (self.coin_y[hit_envs] == y[hit_envs, None])
+            )
+            rows, slots = np.nonzero(hit)
+            self._remove(hit_envs[rows], slots)
+
+        # coins on walls vanish and every wall cell that held one spawns a new coin;
+        # duplicate walls on a cell count once, as the first one kills the coins
+        if self.wall_coins:
+            hit_envs, hit_slots = self._pop(self.wall_coins)
+            self.wall_coins = []
+            cells = np.unique(
+                (hit_envs * self.n + self.coin_x[hit_envs, hit_slots]) * self.n
+                + self.coin_y[hit_envs, hit_slots]
+            )
+            self._remove(hit_envs, hit_slots)
+            respawns = np.bincount(cells // self.n**2, minlength=self.num_envs)
+            while respawns.any():
+                self._spawn(respawns > 0)
+                respawns = np.maximum(respawns - 1, 0)
+
+        # agents sharing a cell lose points, unless it is on the top row or left column
+        same_cell = (self.pos[:, :, None, :] == self.pos[:, None, :, :]).all(axis=3)
+        same_cell &= ~np.eye(self.num_agents, dtype=bool)
+        penalized = (self.pos != 0).all(axis=2)
+        same_cell &= penalized[:, :, None] & penalized[:, None, :]
+        self.scores -= COLLISION_PENALTY * same_cell.sum(axis=2)
+        return self.scores - before
+
+
+def check_parity(seeds, ticks: int = env.SEC * env.FPS + 1) -> list[int]:
+    """Play `randPlayer` vs `randPlayer` in both engines and return mismatching seeds.
+
+    The sprite match is played by `engine.run_match`; the batch replays the same
+    random paths from the same start cells. Positions, scores and coin grids are
+    compared after every tick.
+    """
+    # pylint: disable=import-outside-toplevel
+    import engine
+
+    sprite_states = []
+    starts = []
+    for seed in seeds:
+        env.generate_world(seed)
+        random.seed(seed)
+        players = [engine.AGENTS["randPlayer"](slot) for slot in range(2)]
+        starts.append(
+            [(plr.rect.x // env.SPEED, plr.rect.y // env.SPEED) for plr in players]
+        )
+        states = []
+
+        def record(_tick, players=players, states=states):
+            grid = env.coins.value_grid.copy()
+            positions = [
+                (plr.rect.x // env.SPEED, plr.rect.y // env.SPEED) for plr in players
+            ]
+            states.append((positions, [plr.score for plr in players], grid))
+
+        engine.run_match(*players, ticks, on_tick=record)
+        sprite_states.append(states)
+
+    batch = BatchEnv(seeds, starts)
+    paths = np.array([worldgen.random_agent_paths(seed, env.STEPNUM) for seed in seeds])
+    mismatched = set()
+    for tick in range(ticks):
+        batch.step(paths[:, :, tick])
+        for idx, seed in enumerate(seeds):
+            positions, scores, grid = sprite_states[idx][tick]
+            if (
+                batch.pos[idx].tolist() != [list(pos) for pos in positions]
+                or batch.scores[idx].tolist() != scores
+                or not np.array_equal(batch.coin_value[idx], grid)
+            ):
+                mismatched.add(seed)
+    return sorted(mismatched)
+
+
+def main():
+    """Check parity with the sprite engine or measure batch throughput."""
+    parser = argparse.ArgumentParser(
+        description="vectorized tileworld batch environment",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--parity", action="store_true", help="compare with engine.py")
+    parser.add_argument("-e", "--envs", type=int, default=256)
+    parser.add_argument("-t", "--ticks", type=int, default=env.SEC * env.FPS + 1)
+    args = parser.parse_args()
+
+    seeds = list(range(args.envs))
+    if args.parity:
+        mismatched = check_parity(seeds, args.ticks)
+        print(f"{len(seeds) - len(mismatched)} of {len(seeds)} seeds match")
+        if mismatched:
+            print(f"mismatched seeds: {mismatched}")
+            sys.exit(1)
+        return
+
+    batch = BatchEnv(seeds)
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    for _ in range(args.ticks):
+        batch.step(rng.integers(0, 5, size=(batch.num_envs, batch.num_agents)))
+    elapsed = time.perf_counter() - start
+    print(f"{batch.num_envs * args.ticks / elapsed:,.0f} env-steps/s")
+
+
+if __name__ == "__main__":
+    main()
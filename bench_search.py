@@ -0,0 +1,84 @@
+"""bench_search.py: Micro-benchmarks for the grid searches in `search.py`."""
+
+import argparse
+import heapq
+import time
+
+import numpy as np
+
+from grid import WallGrid
+from search import GridSearch
+
+MOVES = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+
+def legacy_find_path(grid: WallGrid, targets: list, my_pos: tuple, depth: int = 10):
+    """The search `PlayerB.find_path` used before `search.py`, kept for comparison."""
+    frontier = [(0, my_pos, my_pos)]
+    visited = {}
+    while frontier:
+        current = heapq.heappop(frontier)
+        for move in MOVES:
+            next_pos = (current[1][0] + move[0], current[1][1] + move[1])
+            if grid.is_blocked(next_pos) or next_pos in visited.values():
+                continue
+            if next_pos in targets or current[0] == depth:
+                visited[next_pos] = current[1]
+                return next_pos
+            heapq.heappush(frontier, (current[0] + 1, next_pos, current[1]))
+            visited[next_pos] = current[1]
+    return my_pos
+
+
+def random_grid(n: int, density: float, seed: int) -> WallGrid:
+    """Return an `n` x `n` grid with about `density` of the cells walled."""
+    rng = np.random.default_rng(seed)
+    grid = WallGrid(n)
+    grid.blocked[:] = rng.random((n, n)) < density
+    grid.blocked[0, 0] = grid.blocked[n - 1, n - 1] = False
+    return grid
+
+
+def timed(func, repeat: int):
+    """Return the mean run time of `func` in milliseconds and its last result."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    """Time every search from corner to corner at each grid size."""
+    parser = argparse.ArgumentParser(
+        description="grid search micro-benchmarks",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("-n", "--sizes", type=int, nargs="+", default=[11, 101, 1001])
+    parser.add_argument("-d", "--density", type=float, default=0.2)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        grid = random_grid(n, args.density, seed=n)
+        search = GridSearch(grid)
+        start, goal = (0, 0), (n - 1, n - 1)
+        rng = np.random.default_rng(0)
+        coins = [tuple(cell) for cell in rng.integers(0, n, size=(n, 2))]
+        repeat = max(1, args.repeat * 1000 // (n * n) if n < 100 else args.repeat)
+
+        runs = {
+            "bfs depth 10 (legacy)": lambda: legacy_find_path(grid, coins, start),
+            "bfs depth 10": lambda: search.bfs(start, coins, 10),
+            "bfs to corner": lambda: search.bfs(start, [goal]),
+            "astar to corner": lambda: search.astar(start, goal),
+            "dijkstra to any coin": lambda: search.dijkstra(start, coins),
+        }
+        print(f"N = {n} ({repeat} runs each):")
+        for name, func in runs.items():
+            millis, result = timed(func, repeat)
+            expanded = getattr(result, "expanded", "-")
+            print(f"  {name:<22} {millis:10.3f} ms  ({expanded} expanded)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,69 +1,210 @@
-"""benchmark.py: Run the project multiple times and calculate statistics."""
+"""benchmark.py: Run the project multiple times and calculate statistics.
+
+With `--compare`, two agents play paired matches instead: every seed is played in
+both slot orders, and the seed's score difference is the mean of the two. Seeds
+are played in batches, and after each batch a confidence interval on the mean
+difference is checked. The run stops as soon as the interval excludes zero, or
+when `--max-runs` seeds have been played. Each check uses `alpha / looks`
+(Bonferroni over the planned looks), so stopping early does not inflate the
+error rate.
+"""
 
 import argparse
-import re
+import dataclasses
+import json
+import math
 import statistics
-import subprocess
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Iterator
 
-parser = argparse.ArgumentParser(
-    description="stats for your tileworld runs",
-    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
-)
-parser.add_argument("-r", "--runs", type=int, default=10)
-args = parser.parse_args()
+from tournament import Pairing, parse_pairing, run_tournament
 
-p1_scores: list[int] = []
-p1_win_count = 0
 
-p2_scores: list[int] = []
-p2_win_count = 0
+@dataclass(frozen=True)
+class Look:
+    """Paired comparison statistics after one batch of seeds."""
 
-for run_num in range(args.runs):
-    print(f"Run {run_num + 1} of {args.runs}:")
+    seeds: int
+    mean_diff: float
+    diff_low: float
+    diff_high: float
+    win_rate: float
+    win_low: float
+    win_high: float
 
-    run_cap = subprocess.run(
-        ["python", "main.py"], capture_output=True, text=True, check=True
-    )
+    @property
+    def significant(self) -> bool:
+        """Check if the score difference interval excludes zero."""
+        return self.diff_low > 0 or self.diff_high < 0
 
-    score1_re = re.compile(r"Score of Player 1: (-?\d*)")
-    if p1_search_tmp := score1_re.search(run_cap.stdout):
-        if p1_score_tmp := p1_search_tmp.group(1):
-            p1_scores.append(int(p1_score_tmp))
-    else:
-        raise Exception("Could not find Player 1 score")
 
-    score2_re = re.compile(r"Score of Player 2: (-?\d*)")
-    if p2_search_tmp := score2_re.search(run_cap.stdout):
-        if p2_score_tmp := p2_search_tmp.group(1):
-            p2_scores.append(int(p2_score_tmp))
+def wilson_interval(wins: float, total: int, z: float) -> tuple[float, float]:
+    """Return the Wilson score interval of a win rate."""
+    rate = wins / total
+    scale = 1 + z * z / total
+    center = rate + z * z / (2 * total)
+    spread = z * math.sqrt(rate * (1 - rate) / total + z * z / (4 * total * total))
+    return (center - spread) / scale, (center + spread) / scale
+
+
+def compare(
+    pairing: Pairing,
+    first_seed: int = 0,
+    alpha: float = 0.05,
+    max_runs: int = 1000,
+    batch: int = 32,
+    workers: int | None = None,
+) -> Iterator[tuple[Look, list[float]]]:
+    """Yield the statistics and the per-seed differences after every batch.
+
+    A difference is the first agent's score minus the second's, averaged over
+    both slot orders. Stops after the first significant look or `max_runs` seeds.
+    """
+    looks = math.ceil(max_runs / batch)
+    z = NormalDist().inv_cdf(1 - alpha / looks / 2)
+    swapped = (pairing[1], pairing[0])
+    diffs: list[float] = []
+    for start in range(first_seed, first_seed + max_runs, batch):
+        seeds = range(start, min(start + batch, first_seed + max_runs))
+        played: dict[int, float] = {}
+        # results come in task order: every seed as given, then every seed swapped
+        flips = [False] * len(seeds) + [True] * len(seeds)
+        results = run_tournament(seeds, [pairing, swapped], workers=workers)
+        for flipped, res in zip(flips, results):
+            diff = res.score1 - res.score2
+            if flipped:
+                diff = -diff
+            played[res.seed] = played.get(res.seed, 0) + diff / 2
+        diffs.extend(played[seed] for seed in seeds)
+
+        total = len(diffs)
+        mean = statistics.mean(diffs)
+        error = (
+            z * statistics.stdev(diffs) / math.sqrt(total) if total > 1 else math.inf
+        )
+        wins = sum(diff > 0 for diff in diffs) + sum(diff == 0 for diff in diffs) / 2
+        win_low, win_high = wilson_interval(wins, total, z)
+        look = Look(
+            total, mean, mean - error, mean + error, wins / total, win_low, win_high
+        )
+        yield look, diffs
+        if look.significant:
+            return
+
+
+def run_comparison(args):
+    """Run `compare` from the command line and write the JSON report."""
+    history = []
+    diffs: list[float] = []
+    for look, diffs in compare(
+        args.compare, args.seed, args.alpha, args.max_runs, args.batch, args.workers
+    ):
+        history.append(look)
+        print(
+            f"{look.seeds:>5} seeds: diff {look.mean_diff:+.2f} "
+            f"[{look.diff_low:+.2f}, {look.diff_high:+.2f}], "
+            f"win rate {look.win_rate:.3f} [{look.win_low:.3f}, {look.win_high:.3f}]"
+        )
+
+    last = history[-1]
+    if not last.significant:
+        verdict = "inconclusive"
     else:
-        raise Exception("Could not find Player 2 score")
+        verdict = args.compare[0] if last.mean_diff > 0 else args.compare[1]
+    print(f"\nbetter: {verdict}")
+    if args.output:
+        report = {
+            "players": list(args.compare),
+            "first_seed": args.seed,
+            "alpha": args.alpha,
+            "max_runs": args.max_runs,
+            "batch": args.batch,
+            "better": verdict,
+            "looks": [dataclasses.asdict(look) for look in history],
+            "diffs": diffs,
+        }
+        with open(args.output, "w", encoding="utf-8") as out:
+            json.dump(report, out, indent=2)
+            out.write("\n")
+
+
+def run_benchmark(args):
+    """Play `--runs` matches of one pairing and print per-player statistics."""
+    p1_scores: list[int] = []
+    p1_win_count = 0
+
+    p2_scores: list[int] = []
+    p2_win_count = 0
+
+    seeds = range(args.seed, args.seed + args.runs)
+    results = run_tournament(seeds, [args.pairing], workers=args.workers)
+    for run_num, result in enumerate(results):
+        print(f"Run {run_num + 1} of {args.runs} (seed {result.seed}):")
 
-    if p1_scores[-1] > p2_scores[-1]:
-        p1_win_count += 1
+        p1_scores.append(result.score1)
+        p2_scores.append(result.score2)
+
+        if p1_scores[-1] > p2_scores[-1]:
+            p1_win_count += 1
+        else:
+            p2_win_count += 1
+
+        print(f"  Player 1: {p1_scores[-1]}")
+        print(f"  Player 2: {p2_scores[-1]}")
+
+    print("\nSummary:")
+
+    print(f"\nPlayer 1 ({args.pairing[0]}):\n")
+    print(f"  Wins: {p1_win_count}")
+    print(f"  Total Points: {sum(p1_scores)}\n")
+    print(f"  Scores: {p1_scores}")
+    print(f"  Sorted: {sorted(p1_scores)}")
+    print(f"  Mean: {statistics.mean(p1_scores)}")
+    print(f"  Median: {statistics.median(p1_scores)}")
+    print(f"  Std Dev: {statistics.stdev(p1_scores):.2f}")
+
+    print(f"\nPlayer 2 ({args.pairing[1]}):\n")
+    print(f"  Wins: {p2_win_count}")
+    print(f"  Total Points: {sum(p2_scores)}\n")
+    print(f"  Scores: {p2_scores}")
+    print(f"  Sorted: {sorted(p2_scores)}")
+    print(f"  Mean: {statistics.mean(p2_scores)}")
+    print(f"  Median: {statistics.median(p2_scores)}")
+    print(f"  Std Dev: {statistics.stdev(p2_scores):.2f}")
+
+
+def main():
+    """Benchmark one pairing, or compare two agents with `--compare`."""
+    parser = argparse.ArgumentParser(
+        description="stats for your tileworld runs",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("-r", "--runs", type=int, default=10)
+    parser.add_argument(
+        "-s", "--seed", type=int, default=0, help="seed of the first run"
+    )
+    parser.add_argument(
+        "-p", "--pairing", type=parse_pairing, default=("PlayerA", "PlayerB")
+    )
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument(
+        "-c",
+        "--compare",
+        type=parse_pairing,
+        help="compare two agents (A:B) with paired matches until significant",
+    )
+    parser.add_argument("--alpha", type=float, default=0.05, help="significance")
+    parser.add_argument("--max-runs", type=int, default=1000, help="seeds at most")
+    parser.add_argument("--batch", type=int, default=32, help="seeds per look")
+    parser.add_argument("-o", "--output", help="write the comparison report (.json)")
+    args = parser.parse_args()
+
+    if args.compare:
+        run_comparison(args)
     else:
-        p2_win_count += 1
-
-    print(f"  Player 1: {p1_scores[-1]}")
-    print(f"  Player 2: {p2_scores[-1]}")
-
-
-print("\nSummary:")
-
-print("\nPlayer 1:\n")
-print(f"  Wins: {p1_win_count}")
-print(f"  Total Points: {sum(p1_scores)}\n")
-print(f"  Scores: {p1_scores}")
-print(f"  Sorted: {sorted(p1_scores)}")
-print(f"  Mean: {statistics.mean(p1_scores)}")
-print(f"  Median: {statistics.median(p1_scores)}")
-print(f"  Std Dev: {statistics.stdev(p1_scores):.2f}")
-
-print("\nPlayer 2:\n")
-print(f"  Wins: {p2_win_count}")
-print(f"  Total Points: {sum(p2_scores)}\n")
-print(f"  Scores: {p2_scores}")
-print(f"  Sorted: {sorted(p2_scores)}")
-print(f"  Mean: {statistics.mean(p2_scores)}")
-print(f"  Median: {statistics.median(p2_scores)}")
-print(f"  Std Dev: {statistics.stdev(p2_scores):.2f}")
+        run_benchmark(args)
+
+
+if __name__ == "__main__":
+    main()
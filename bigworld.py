@@ -0,0 +1,382 @@
+"""bigworld.py: Chunked worlds for N in the thousands.
+
+The sprite world keeps every wall and coin as a pygame sprite and scans the whole
+board each frame, which is fine at N = 11 but not at N = 10000. A `ChunkedWorld`
+splits the board into square chunks of `chunk` x `chunk` cells:
+  - a chunk's walls are generated from (seed, chunk) the first time anything looks
+    at it, and kept in a bounded cache; evicted chunks are simply regenerated;
+  - only chunks within `radius` chunks of an agent are active: only they spawn,
+    expire and hold coins, and a chunk's coins are dropped when it goes idle.
+Memory and per-tick work therefore follow the region around the agents, not N^2.
+
+Walls and coins keep the densities of the default 11 x 11 world: WALLNUM walls per
+N^2 cells, up to N live coins per N^2 cells and one spawn per N^2 cells per tick.
+Like in `env.step_world` coins never stay on walls (spawns redraw the cell), but
+coins spawned on the same cell merge into one, keeping the later expiry.
+"""
+
+import argparse
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import env
+from batch_env import ACTION_DELTAS, COLLISION_PENALTY, STAY
+from compAgent import grid_partitions
+from grid import Location, WallGrid
+from search import GridSearch
+
+Key = tuple[int, int]
+
+WALL_DENSITY = env.WALLNUM / env.N**2
+COIN_DENSITY = env.N / env.N**2
+SPAWN_AREA = env.N**2  # cells per coin spawned each tick
+
+# action that moves by each (dx, dy)
+ACTIONS = {tuple(delta): action for action, delta in enumerate(ACTION_DELTAS.tolist())}
+
+
+def chunk_walls(seed: int, n: int, size: int, key: Key) -> np.ndarray:
+    """Generate the wall mask of chunk `key`; cells off the board count as walls."""
+    origin_x, origin_y = key[0] * size, key[1] * size
+    walls = np.zeros((size, size), dtype=bool)
+    walls[max(0, n - origin_x) :, :] = True
+    walls[:, max(0, n - origin_y) :] = True
+
+    # walls are never placed on the outer rows and columns, like in `worldgen`
+    rng = np.random.default_rng((seed, *key, 1))
+    cells = rng.integers(0, size, size=(round(WALL_DENSITY * size * size), 2))
+    cells += (origin_x, origin_y)
+    inner = ((cells >= 1) & (cells <= n - 2)).all(axis=1)
+    cells = cells[inner] - (origin_x, origin_y)
+    walls[cells[:, 0], cells[:, 1]] = True
+    return walls
+
+
+def random_starts(seed: int, n: int, size: int, num_agents: int) -> np.ndarray:
+    """Draw distinct start cells off the walls, seeded by `seed`."""
+    rng = np.random.default_rng((seed, 2))
+    starts: list[tuple[int, int]] = []
+    while len(starts) < num_agents:
+        x, y = rng.integers(1, n - 1, size=2).tolist()
+        walls = chunk_walls(seed, n, size, (x // size, y // size))
+        if not walls[x % size, y % size] and (x, y) not in starts:
+            starts.append((x, y))
+    return np.array(starts)
+
+
+class Chunk:
+    """Coin state of one active chunk, indexed [x, y] relative to `origin`."""
+
+    def __init__(self, key: Key, size: int, walls: np.ndarray, seed: int):
+        """Start the chunk without coins; `walls` also marks off-board cells."""
+        self.key = key
+        self.origin = (key[0] * size, key[1] * size)
+        self.free = np.flatnonzero(~walls)  # flat indices coins may spawn on
+        self.value = np.zeros((size, size), dtype=np.int16)
+        self.expire = np.zeros((size, size), dtype=np.int32)
+        self.count = 0
+        self.capacity = max(1, round(COIN_DENSITY * self.free.size))
+        self.spawn_rate = max(1, round(self.free.size / SPAWN_AREA))
+        self.rng = np.random.default_rng((seed, *key))
+
+    @property
+    def nbytes(self) -> int:
+        """Return the memory held by the chunk's arrays."""
+        return self.free.nbytes + self.value.nbytes + self.expire.nbytes
+
+    def step(self, tick: int, expire_ticks: int):
+        """Expire old coins, then spawn new ones up to the chunk's capacity."""
+        expired = (self.value > 0) & (self.expire < tick)
+        if expired.any():
+            self.value[expired] = 0
+            self.expire[expired] = 0
+            self.count -= int(expired.sum())
+
+        spawns = min(self.spawn_rate, self.capacity - self.count)
+        if spawns <= 0 or not self.free.size:
+            return
+        cells = self.free[self.rng.integers(0, self.free.size, size=spawns)]
+        values = self.rng.integers(1, 10, size=spawns)
+        lives = self.rng.integers(1, 5, size=spawns) * expire_ticks + tick
+        value, expire = self.value.reshape(-1), self.expire.reshape(-1)
+        self.count += int(np.unique(cells[value[cells] == 0]).size)
+        np.add.at(value, cells, values)
+        np.maximum.at(expire, cells, lives)
+
+    def take(self, local: Key) -> int:
+        """Remove the coins on the chunk cell `local` and return their value."""
+        value = int(self.value[local])
+        if value:
+            self.value[local] = 0
+            self.expire[local] = 0
+            self.count -= 1
+        return value
+
+
+class ChunkedWorld:
+    """A large board stepped around its agents, chunk by chunk.
+
+    Agents are cells in `pos` (num_agents, 2) with `scores`; `step` takes one action
+    per agent, using the action codes of `batch_env`.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        seed: int,
+        n: int,
+        starts,
+        chunk: int = 64,
+        radius: int = 1,
+        fps: int = env.FPS,
+        wall_cache: int = 1024,
+    ):
+        """Create the world; `starts` holds one (x, y) start cell per agent."""
+        self.seed = seed
+        self.n = n
+        self.chunk = chunk
+        self.radius = radius
+        self.expire_ticks = fps  # ticks per second of coin lifespan
+        self.wall_cache = wall_cache
+        self.tick = 0
+        self.pos = np.array(starts, dtype=np.int64).reshape(-1, 2)
+        self.scores = np.zeros(len(self.pos), dtype=np.int64)
+        self.chunks: dict[Key, Chunk] = {}
+        self._walls: OrderedDict[Key, np.ndarray] = OrderedDict()
+        self._activate()
+
+    @property
+    def num_agents(self) -> int:
+        """Return the number of agents."""
+        return len(self.pos)
+
+    def chunk_of(self, loc: Location) -> Key:
+        """Return the key of the chunk holding `loc`."""
+        return (int(loc[0]) // self.chunk, int(loc[1]) // self.chunk)
+
+    def walls(self, key: Key) -> np.ndarray:
+        """Return the wall mask of a chunk; cells off the board count as walls."""
+        walls = self._walls.get(key)
+        if walls is not None:
+            self._walls.move_to_end(key)
+            return walls
+
+        walls = chunk_walls(self.seed, self.n, self.chunk, key)
+        self._walls[key] = walls
+        if len(self._walls) > self.wall_cache:
+            self._walls.popitem(last=False)
+        return walls
+
+    def is_wall(self, loc: Location) -> bool:
+        """Check if `loc` is a wall cell; off-board cells are not walls."""
+        return self.on_board(loc) and self._cell(self.walls(self.chunk_of(loc)), loc)
+
+    def is_blocked(self, loc: Location) -> bool:
+        """Check if an agent may not stand on `loc`: a wall or off the board."""
+        return not self.on_board(loc) or self._cell(self.walls(self.chunk_of(loc)), loc)
+
+    def on_board(self, loc: Location) -> bool:
+        """Check if `loc` lies on the board."""
+        return 0 <= loc[0] < self.n and 0 <= loc[1] < self.n
+
+    def _cell(self, array: np.ndarray, loc: Location):
+        """Return the entry of a chunk array at the board cell `loc`."""
+        return array[int(loc[0]) % self.chunk, int(loc[1]) % self.chunk].item()
+
+    def coin_value(self, loc: Location) -> int:
+        """Return the value of the coins on `loc` (0 outside the active chunks)."""
+        chunk = self.chunks.get(self.chunk_of(loc))
+        return self._cell(chunk.value, loc) if chunk else 0
+
+    def _active_keys(self) -> set[Key]:
+        """Return the keys of the chunks within `radius` of any agent."""
+        last = (self.n - 1) // self.chunk
+        keys = set()
+        for key_x, key_y in {self.chunk_of(loc) for loc in self.pos}:
+            for x in range(
+                max(0, key_x - self.radius), min(last, key_x + self.radius) + 1
+            ):
+                for y in range(
+                    max(0, key_y - self.radius), min(last, key_y + self.radius) + 1
+                ):
+                    keys.add((x, y))
+        return keys
+
+    def _activate(self):
+        """Load the chunks around the agents and drop the coins of the others."""
+        active = self._active_keys()
+        for key in self.chunks.keys() - active:
+            del self.chunks[key]
+        for key in active - self.chunks.keys():
+            self.chunks[key] = Chunk(key, self.chunk, self.walls(key), self.seed)
+
+    def step(self, actions) -> np.ndarray:
+        """Play one tick with one action per agent; return the score deltas."""
+        actions = np.asarray(actions).reshape(self.num_agents)
+        before = self.scores.copy()
+        self.tick += 1
+
+        # spawn and expire coins in the active chunks, then move
+        for chunk in self.chunks.values():
+            chunk.step(self.tick, self.expire_ticks)
+        for idx, action in enumerate(actions):
+            target = self.pos[idx] + ACTION_DELTAS[action]
+            if not self.is_blocked(target):
+                self.pos[idx] = target
+        self._activate()
+
+        # pickups go to agents in order
+        for idx, loc in enumerate(self.pos):
+            chunk = self.chunks[self.chunk_of(loc)]
+            local = (loc[0] - chunk.origin[0], loc[1] - chunk.origin[1])
+            self.scores[idx] += chunk.take(local)
+
+        # agents sharing a cell lose points, unless it is on the top row or left column
+        cells: dict[Location, list[int]] = {}
+        for idx, (x, y) in enumerate(self.pos.tolist()):
+            if x != 0 and y != 0:
+                cells.setdefault((x, y), []).append(idx)
+        for sharing in cells.values():
+            if len(sharing) > 1:
+                self.scores[sharing] -= COLLISION_PENALTY * (len(sharing) - 1)
+        return self.scores - before
+
+    def window(self, loc: Location, radius: int = 1):
+        """Return the chunk-aligned square of chunks within `radius` of `loc`.
+
+        The result is (origin, walls, coins): the board cell of the window's [0, 0]
+        and its wall mask (off-board cells blocked) and coin values, indexed [x, y].
+        """
+        key_x, key_y = self.chunk_of(loc)
+        span = 2 * radius + 1
+        size = self.chunk
+        walls = np.ones((span * size, span * size), dtype=bool)
+        coins = np.zeros((span * size, span * size), dtype=np.int16)
+        for i in range(span):
+            for j in range(span):
+                key = (key_x - radius + i, key_y - radius + j)
+                if not (0 <= key[0] * size < self.n and 0 <= key[1] * size < self.n):
+                    continue
+                cells = np.s_[i * size : (i + 1) * size, j * size : (j + 1) * size]
+                walls[cells] = self.walls(key)
+                if key in self.chunks:
+                    coins[cells] = self.chunks[key].value
+        origin = ((key_x - radius) * size, (key_y - radius) * size)
+        return origin, walls, coins
+
+    @property
+    def wall_chunks(self) -> int:
+        """Return the number of chunks whose walls are cached."""
+        return len(self._walls)
+
+    def nbytes(self) -> int:
+        """Return the memory held by the active chunks and the wall cache."""
+        active = sum(chunk.nbytes for chunk in self.chunks.values())
+        return active + sum(walls.nbytes for walls in self._walls.values())
+
+
+class ChunkSeeker:
+    """Agent for chunked worlds: walk towards the closest coin in view.
+
+    The view is the window of chunks around the agent's chunk. Searches reuse one
+    `GridSearch` per window, so it is only rebuilt when the agent changes chunk.
+    With `partitioned`, coins in the 3x3 partitions (see `PlayerB`) holding another
+    agent are ignored.
+    """
+
+    def __init__(
+        self,
+        world: ChunkedWorld,
+        idx: int,
+        view: int = 1,
+        max_depth: int | None = None,
+        partitioned: bool = False,
+    ):
+        """Control agent `idx` of `world`."""
+        self.world = world
+        self.idx = idx
+        self.view = view
+        self.max_depth = max_depth
+        self.partitions = grid_partitions(world.n) if partitioned else []
+        self.origin: Location | None = None
+        self.search: GridSearch | None = None
+
+    def act(self) -> int:
+        """Return the action of the first move towards the closest coin."""
+        loc = tuple(self.world.pos[self.idx].tolist())
+        origin, walls, coins = self.world.window(loc, self.view)
+        if origin != self.origin:
+            grid = WallGrid(walls.shape[0])
+            grid.blocked[:] = walls
+            self.origin, self.search = origin, GridSearch(grid)
+
+        goals = np.argwhere(coins > 0)
+        if self.partitions:
+            others = [
+                tuple(pos)
+                for idx, pos in enumerate(self.world.pos.tolist())
+                if idx != self.idx
+            ]
+            cells = goals + origin
+            keep = np.ones(len(goals), dtype=bool)
+            for part in self.partitions:
+                if any(pos in part for pos in others):
+                    keep &= ~(
+                        (cells[:, 0] >= part.x_min)
+                        & (cells[:, 0] <= part.x_max)
+                        & (cells[:, 1] >= part.y_min)
+                        & (cells[:, 1] <= part.y_max)
+                    )
+            goals = goals[keep]
+        if not len(goals):
+            return STAY
+
+        local = (loc[0] - origin[0], loc[1] - origin[1])
+        found = self.search.bfs(local, goals, self.max_depth)
+        if not found.path:
+            return STAY
+        step = found.path[0]
+        return ACTIONS[(step[0] - local[0], step[1] - local[1])]
+
+
+def main():
+    """Play seekers on a large chunked world and report throughput and memory."""
+    parser = argparse.ArgumentParser(
+        description="large chunked tileworld stress test",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("-n", "--size", type=int, default=5000, help="board size N")
+    parser.add_argument("-k", "--agents", type=int, default=4)
+    parser.add_argument("-t", "--ticks", type=int, default=500)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-c", "--chunk", type=int, default=64, help="chunk size")
+    parser.add_argument("-d", "--depth", type=int, default=None, help="search depth")
+    parser.add_argument("--partitioned", action="store_true")
+    args = parser.parse_args()
+
+    starts = random_starts(args.seed, args.size, args.chunk, args.agents)
+    world = ChunkedWorld(args.seed, args.size, starts, args.chunk)
+    agents = [
+        ChunkSeeker(world, idx, max_depth=args.depth, partitioned=args.partitioned)
+        for idx in range(args.agents)
+    ]
+
+    start = time.perf_counter()
+    for _ in range(args.ticks):
+        world.step([agent.act() for agent in agents])
+    elapsed = time.perf_counter() - start
+
+    print(f"N = {args.size}, {args.agents} agents, {args.ticks} ticks")
+    print(f"  {args.ticks / elapsed:,.0f} ticks/s")
+    print(
+        f"  active chunks: {len(world.chunks)}, cached wall chunks: {world.wall_chunks}"
+    )
+    print(f"  memory: {world.nbytes() / 2**20:.1f} MiB")
+    print(f"  scores: {world.scores.tolist()}")
+
+
+if __name__ == "__main__":
+    main()
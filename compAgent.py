@@ -1,17 +1,18 @@
 """User defined player classes."""
 
-import heapq
 from enum import Enum, unique
 
+import env
+import render
 from env import *
+from distance_table import UNREACHABLE, DistanceTable
+from search import GridSearch, PathCache, SearchResult
 
 Location = tuple[int, int]
 
 # You can use your own favorite icon or as simple as a colored square
 # (with different colors) to represent your agent(s).
-playerA_img = pygame.image.load(os.path.join("img", "playerA.png")).convert()
-playerB_img = pygame.image.load(os.path.join("img", "playerB.png")).convert()
-sonic_img = pygame.image.load(os.path.join("img", "sonic_art.png")).convert_alpha()
+# Images are loaded by `render.load` the first time an agent is drawn.
 
 
 @unique
@@ -32,6 +33,8 @@ def get_distance(loc_a: Location, loc_b: Location) -> int:
 class Partition:
     """Partition class to represent a partition of the map."""
 
+    __slots__ = ("name", "x_min", "x_max", "y_min", "y_max")
+
     def __init__(self, name: str, x_bounds: tuple[int, int], y_bounds: tuple[int, int]):
         """Set the partition boundaries."""
         self.name = name
@@ -47,6 +50,55 @@ class Partition:
         return f"{self.name}: x=[{self.x_min}, {self.x_max}], y=[{self.y_min}, {self.y_max}]"
 
 
+def grid_partitions(n: int, k: int = 3, overlap: int = 1) -> list[Partition]:
+    """Return the k x k partitions of an `n` x `n` map, row by row.
+
+    Each partition reaches `overlap` cells into its right and lower neighbours; with
+    the default of 1, neighbours share an edge.
+    """
+    size = n // k
+    bounds = [i * size for i in range(k)] + [n]
+    spans = [(lo, hi - 1 + overlap) for lo, hi in zip(bounds, bounds[1:])]
+    if k == 3:
+        rows, cols = dict(zip("TMB", spans)), dict(zip("LMR", spans))
+    else:
+        rows = {f"R{i}": span for i, span in enumerate(spans)}
+        cols = {f"C{i}": span for i, span in enumerate(spans)}
+    return [Partition(row + col, cols[col], rows[row]) for row in rows for col in cols]
+
+
+def partition_labels(parts: list[Partition], n: int) -> np.ndarray:
+    """Return an `n` x `n` [x, y] grid of the partitions holding each cell.
+
+    Bit i of a cell's label is set when the cell is in `parts[i]`.
+    """
+    if len(parts) > 64:
+        raise ValueError(f"{len(parts)} partitions do not fit in a 64 bit label")
+    labels = np.zeros((n, n), dtype=np.uint64)
+    for bit, part in enumerate(parts):
+        labels[part.x_min : part.x_max + 1, part.y_min : part.y_max + 1] |= np.uint64(
+            1 << bit
+        )
+    return labels
+
+
+def deadline_choice(
+    c_dist: np.ndarray, c_val: np.ndarray, c_life: np.ndarray, horizon: int
+) -> int | None:
+    """Return the index of the coin worth the most per step that is reached in time.
+
+    Coins that are unreachable, more than `horizon` moves away, or expire before an
+    agent moving one cell per tick arrives (`max(dist, 1) > life`, see
+    `Environment.life_grid`) are dropped. Ties go to the closer coin.
+    """
+    steps = np.maximum(c_dist, 1)
+    feasible = (c_dist != UNREACHABLE) & (c_dist <= horizon) & (steps <= c_life)
+    if not feasible.any():
+        return None
+    per_step = np.where(feasible, c_val / steps, -1.0)
+    return int(np.lexsort((c_dist, -per_step))[0])
+
+
 class PlayerA(pygame.sprite.Sprite):
     """Defines a Hybrid, Pathfinding agent.
 
@@ -58,24 +110,44 @@ class PlayerA(pygame.sprite.Sprite):
 
     HALF_HEIGHT = (HEIGHT // WALLSIZE) // 2
     HALF_WIDTH = (WIDTH // WALLSIZE) // 2
-    WALL_POS = [(wall[0] // WALLSIZE, wall[1] // WALLSIZE) for wall in get_wall_data()]
 
-    def __init__(self):
-        """Initialize the agent."""
+    # with `deadline` targeting, coins further than this many moves are ignored
+    HORIZON = 15
+
+    image = render.LazyImage()
+
+    def __init__(
+        self,
+        distances: DistanceTable | None = None,
+        world: Environment | None = None,
+        deadline: bool = False,
+    ):
+        """Initialize the agent in `world` (default: the module's world).
+
+        With a precomputed `distances` table, coins are ranked by true path
+        distance and the next move is looked up instead of searched. With
+        `deadline`, the agent skips coins that expire before it can arrive and
+        prefers the most value per step within `HORIZON` moves.
+        """
         pygame.sprite.Sprite.__init__(self)
-        self.image = playerA_img
-        self.image = pygame.transform.scale(playerA_img, (WALLSIZE, WALLSIZE))
-        self.image.set_colorkey(BLACK)
-        pygame.draw.rect(
-            self.image, rand_color(random.randint(0, N)), self.image.get_rect(), 1
-        )
-        self.rect: pygame.rect.Rect = self.image.get_rect()  # get image position
+        self.border = rand_color(random.randint(0, N))
+        self.rect: pygame.rect.Rect = pygame.Rect(0, 0, WALLSIZE, WALLSIZE)
         self.rect.x = 0
         self.rect.y = 0
         self.speedx = SPEED
         self.speedy = SPEED
         self.score = 0
         self.steps = 0
+        self.distances = distances
+        self.deadline = deadline
+        self.world = world if world is not None else env.world
+        self.search = GridSearch(self.world.wall_grid)
+
+    def build_image(self) -> pygame.Surface:
+        """Return the agent's image with its colored border."""
+        image = render.load("playerA.png", WALLSIZE, BLACK, copy=True)
+        pygame.draw.rect(image, self.border, image.get_rect(), 1)
+        return image
 
     def _is_move_blocked(self, mov_dir: Movement, my_pos: Location) -> bool:
         """Determine if a movement would be blocked."""
@@ -83,18 +155,11 @@ class PlayerA(pygame.sprite.Sprite):
             my_pos[0] + mov_dir.value[0],
             my_pos[1] + mov_dir.value[1],
         )
-        if next_pos in self.WALL_POS:  # type: ignore
-            return True
-        return False
-
-    def _translate_coins(self) -> dict[Location, int]:
-        """Convert coin data into a dictionary, location -> value."""
-        coins_dict: dict[Location, int] = {}
-        coin_values, coin_locs = get_coin_data()
-        for c_val, c_loc in zip(coin_values, coin_locs):
-            pos = (c_loc[0] // self.speedx, c_loc[1] // self.speedy)
-            coins_dict[pos] = c_val
-        return coins_dict
+        return self.world.wall_grid.is_blocked(next_pos)
+
+    def _translate_coins(self) -> np.ndarray:
+        """Return the (x, y) rows of the coins, in the order they spawned."""
+        return np.array(list(self.world.coins.by_pos), dtype=int).reshape(-1, 2)
 
     def move(self, direction):
         """Translate movement intention into a change in position."""
@@ -118,45 +183,58 @@ class PlayerA(pygame.sprite.Sprite):
                     self.rect.y -= self.speedy
 
         # Avoid colliding with wall and go out of edges
-        self.rect.right = min(self.rect.right, WIDTH)
+        self.rect.right = min(self.rect.right, self.world.width)
         self.rect.left = max(self.rect.left, 0)
-        self.rect.bottom = min(self.rect.bottom, HEIGHT)
+        self.rect.bottom = min(self.rect.bottom, self.world.height)
         self.rect.top = max(self.rect.top, 0)
 
     def is_player_collide_wall(self):
         """Determine wall collision state."""
-        for wll in walls:
-            if self.rect.colliderect(wll):  # type: ignore
-                return True
-        return False
+        return self.world.wall_grid.is_blocked(
+            (self.rect.x // self.speedx, self.rect.y // self.speedy)
+        )
 
     def update(self):
         """Implement agent's hybrid logic."""
         # update my_pos
         my_pos = (self.rect.x // self.speedx, self.rect.y // self.speedy)
 
-        # update coin_dict
-        coin_dict = self._translate_coins()
-
-        # calculate agent's coin queue
-        coin_queue: list[tuple[float, int, Location]] = []
-        for c_loc, c_val in coin_dict.items():
-            c_dist = get_distance(my_pos, c_loc)
-
-            heapq.heappush(coin_queue, (c_dist, 9 - c_val, c_loc))
-
-        if not coin_queue:
+        # update coins
+        coins = self._translate_coins()
+        if not len(coins):
             return
 
-        goal = heapq.heappop(coin_queue)
-        visited, next_pos = self.find_path(goal[0], goal[2], my_pos)
-
-        path = [next_pos]
-        while next_pos != my_pos:
-            next_pos = visited[next_pos]
-            path.append(next_pos)
-
-        while path and coin_dict[goal[2]]:
+        # path distances from my_pos, looked up or from one breadth-first search
+        if self.distances:
+            field = self.distances.field(my_pos)
+        elif self.deadline:
+            field = self.search.distance_field(my_pos, max_depth=self.HORIZON)
+        else:
+            field = self.search.distance_field(my_pos, coins)
+        c_x, c_y = coins.T
+        c_dist = field[c_x, c_y]
+        c_val = self.world.coins.value_grid[c_x, c_y]
+
+        if self.deadline:
+            c_life = self.world.life_grid()[c_x, c_y]
+            best = deadline_choice(c_dist, c_val, c_life, self.HORIZON)
+            if best is None:
+                return
+        else:
+            # rank the coins: reachable, closest, most valuable, then first to expire
+            c_expiry = self.world.coins.expiry_grid[c_x, c_y]
+            best = np.lexsort((c_expiry, -c_val, c_dist, c_dist == UNREACHABLE))[0]
+            if c_dist[best] == UNREACHABLE:
+                return
+        goal = (int(c_x[best]), int(c_y[best]))
+
+        if self.distances:
+            next_pos = self.distances.next_step(my_pos, goal)
+            path = [next_pos, my_pos] if next_pos else []
+        else:
+            path = [*reversed(self.search.path_to(goal)), my_pos]
+
+        while path and self.world.coins.value_grid[goal]:
             cmp_pos = path.pop()
             rel_x = cmp_pos[0] - my_pos[0]
             rel_y = cmp_pos[1] - my_pos[1]
@@ -170,162 +248,111 @@ class PlayerA(pygame.sprite.Sprite):
                 case (0, -1):
                     self.move(Movement.UP)
 
-    def find_path(
-        self, dist: float, goal: Location, my_pos: Location
-    ) -> tuple[dict[Location, Location], Location]:
-        """Return path via modified Astar."""
-        # frontier: (priority, current_pos, prev_pos)
-        frontier: list[tuple[int, Location, Location]] = []
-        visited: dict[Location, Location] = {}
-
-        heapq.heappush(frontier, (0, my_pos, my_pos))
-        # Get the path to the coin
-        while frontier:
-            current = heapq.heappop(frontier)
-
-            for mov_dir in Movement:
-                next_pos = (
-                    current[1][0] + mov_dir.value[0],
-                    current[1][1] + mov_dir.value[1],
-                )
-                if get_distance(next_pos, goal) > dist + 3:
-                    continue
-
-                if (
-                    -1 in next_pos
-                    or next_pos[0] > WIDTH // self.speedx
-                    or next_pos[1] > HEIGHT // self.speedy
-                ):
-                    continue
-
-                if next_pos in visited.values():
-                    continue
-                if next_pos in self.WALL_POS:
-                    continue
-                if next_pos == goal:
-                    visited[next_pos] = current[1]
-                    return visited, next_pos
-                if current[0] == 10:
-                    visited[next_pos] = current[1]
-                    return visited, next_pos
-
-                heapq.heappush(
-                    frontier,
-                    (
-                        current[0] + 1,
-                        next_pos,
-                        current[1],
-                    ),
-                )
-                visited[next_pos] = current[1]
-
-        return visited, my_pos
-
 
 class PlayerB(pygame.sprite.Sprite):
     """Defines a Hybrid, Partitioned, Pathfinding agent.
 
     The agent is hybrid in pursuing the closest coin.
-    The agent is partitioned in its responsibilities (3x3 partition of map).
+    The agent is partitioned in its responsibilities (k x k partition of map,
+    3x3 by default).
     The agent uses a pathfinding algorithm to move to the closest coin.
     """
 
     # pylint: disable=too-many-instance-attributes
 
-    # calculate scaling constants
-    SCALED_N = HEIGHT // WALLSIZE
-    THIRD_N = HEIGHT // (WALLSIZE * 3)
-
-    # scale wall locations
-    WALL_POS = [(wall[0] // WALLSIZE, wall[1] // WALLSIZE) for wall in get_wall_data()]
-
-    # define partitions
-    PART_TL = Partition("TL", (0, THIRD_N), (0, THIRD_N))
-    PART_TM = Partition("TM", (THIRD_N, 2 * THIRD_N), (0, THIRD_N))
-    PART_TR = Partition("TR", (2 * THIRD_N, SCALED_N), (0, THIRD_N))
-
-    PART_ML = Partition("ML", (0, THIRD_N), (THIRD_N, 2 * THIRD_N))
-    PART_MM = Partition("MM", (THIRD_N, 2 * THIRD_N), (THIRD_N, 2 * THIRD_N))
-    PART_MR = Partition("MR", (2 * THIRD_N, SCALED_N), (THIRD_N, 2 * THIRD_N))
-
-    PART_BL = Partition("BL", (0, THIRD_N), (2 * THIRD_N, SCALED_N))
-    PART_BM = Partition("BM", (THIRD_N, 2 * THIRD_N), (2 * THIRD_N, SCALED_N))
-    PART_BR = Partition("BR", (2 * THIRD_N, SCALED_N), (2 * THIRD_N, SCALED_N))
-
-    PART_LIST = [
-        PART_BL,
-        PART_BM,
-        PART_BR,
-        PART_TL,
-        PART_TM,
-        PART_TR,
-        PART_ML,
-        PART_MM,
-        PART_MR,
-    ]
-
-    def __init__(self):
-        """Initialize player and set custom image."""
+    # coins further than this many moves away are ignored
+    SEARCH_DEPTH = 10
+
+    # the map is split into PARTITIONS x PARTITIONS partitions that reach
+    # PARTITION_OVERLAP cells into their neighbours
+    PARTITIONS = 3
+    PARTITION_OVERLAP = 1
+
+    # cells' worth of found paths kept for reuse on later frames, 0 to disable
+    PATH_CACHE_SIZE = 256
+
+    image = render.LazyImage()
+
+    def __init__(
+        self,
+        distances: DistanceTable | None = None,
+        world: Environment | None = None,
+        deadline: bool = False,
+        search_depth: int | None = None,
+        partitions: int | None = None,
+        partition_overlap: int | None = None,
+    ):
+        """Initialize player in `world` (default: the module's world).
+
+        With a precomputed `distances` table, the closest allowed coin and the next
+        move are looked up instead of searched. With `deadline`, the agent skips
+        coins that expire before it can arrive and prefers the most value per step
+        within `search_depth` moves. `search_depth`, `partitions` and
+        `partition_overlap` default to the class constants of the same name.
+        """
         pygame.sprite.Sprite.__init__(self)
-        self.image = sonic_img
-        self.image = pygame.transform.scale(sonic_img, (WALLSIZE, WALLSIZE))
-        self.image.set_colorkey(BLUE)
-        pygame.draw.rect(
-            self.image, rand_color(random.randint(0, N)), self.image.get_rect(), 1
-        )
-        self.rect: pygame.rect.Rect = self.image.get_rect()  # get image position
+        self.border = rand_color(random.randint(0, N))
+        self.rect: pygame.rect.Rect = pygame.Rect(0, 0, WALLSIZE, WALLSIZE)
         self.rect.x = 0
         self.rect.y = 0
         self.speedx = SPEED
         self.speedy = SPEED
         self.score = 0
         self.steps = 0
+        self.distances = distances
+        self.deadline = deadline
+        self.world = world if world is not None else env.world
+        self.search = GridSearch(self.world.wall_grid)
+        self.search_depth = (
+            search_depth if search_depth is not None else self.SEARCH_DEPTH
+        )
+        self.part_list = grid_partitions(
+            self.world.n,
+            partitions if partitions is not None else self.PARTITIONS,
+            (
+                partition_overlap
+                if partition_overlap is not None
+                else self.PARTITION_OVERLAP
+            ),
+        )
+        self.part_labels = partition_labels(self.part_list, self.world.n)
+        self.path_cache = PathCache(self.PATH_CACHE_SIZE)
 
         # view partition boundaries
-        # for part in self.PART_LIST:
+        # for part in self.part_list:
         #    print(part)
 
+    def build_image(self) -> pygame.Surface:
+        """Return the agent's image with its colored border."""
+        image = render.load("sonic_art.png", WALLSIZE, BLUE, alpha=True, copy=True)
+        pygame.draw.rect(image, self.border, image.get_rect(), 1)
+        return image
+
     def _is_move_blocked(self, mov_dir: Movement, my_pos: Location) -> bool:
         """Determine if a movement would be blocked."""
         next_pos = (
             my_pos[0] + mov_dir.value[0],
             my_pos[1] + mov_dir.value[1],
         )
-        if next_pos in self.WALL_POS:  # type: ignore
-            return True
-        return False
-
-    def _loc_identity_check(self, pos: Location) -> bool:
-        """Check if the position is the same as the player's position."""
-        return (pos[0] * WALLSIZE, pos[1] * WALLSIZE) == (self.rect.x, self.rect.y)
-
-    def _translate_coins(self, their_parts: list[Partition]) -> list[Location]:
-        """Convert coin data into a dictionary, location -> value."""
-        target_coins: list[Location] = []
-        _, coin_locs = get_coin_data()
-
-        for c_loc in coin_locs:
-            c_pos = (c_loc[0] // self.speedx, c_loc[1] // self.speedy)
-
-            if any((c_pos in part for part in their_parts)):
-                continue
-
-            target_coins.append(c_pos)
-        return target_coins
-
-    def _update_players_pos(self) -> tuple[Location, Location]:
-        """Translate and verify both player's locations."""
-        # list comprehension as Group isn't subscriptable
-        my_pos, their_pos = [
-            (plr.rect.x // self.speedx, plr.rect.y // self.speedy)
-            for plr in players
-            if plr.rect
-        ]
-
-        # swap postions if they're reversed
-        if not self._loc_identity_check(my_pos):
-            their_pos, my_pos = my_pos, their_pos
-        return my_pos, their_pos
+        return self.world.wall_grid.is_blocked(next_pos)
+
+    def _translate_coins(self, excluded: int) -> np.ndarray:
+        """Return the (x, y) rows of the coins outside of the `excluded` partitions.
+
+        Coins are listed in the order they spawned.
+        """
+        coins = np.array(list(self.world.coins.by_pos), dtype=int).reshape(-1, 2)
+        return coins[self.part_labels[coins[:, 0], coins[:, 1]] & excluded == 0]
+
+    def _update_players_pos(self) -> tuple[Location, np.ndarray]:
+        """Return the player's location and the (x, y) rows of all opponents."""
+        my_pos = (self.rect.x // self.speedx, self.rect.y // self.speedy)
+        return my_pos, self.world.opponent_cells(self)
+
+    def _excluded_partitions(self, their_pos: np.ndarray) -> int:
+        """Return the bitmask of the partitions holding any of `their_pos`."""
+        labels = self.part_labels[their_pos[:, 0], their_pos[:, 1]]
+        return int(np.bitwise_or.reduce(labels, initial=np.uint64(0)))
 
     def move(self, direction):
         """Translate movement intention into a change in position."""
@@ -349,40 +376,59 @@ class PlayerB(pygame.sprite.Sprite):
                     self.rect.y -= self.speedy
 
         # Avoid colliding with wall and go out of edges
-        self.rect.right = min(self.rect.right, WIDTH)
+        self.rect.right = min(self.rect.right, self.world.width)
         self.rect.left = max(self.rect.left, 0)
-        self.rect.bottom = min(self.rect.bottom, HEIGHT)
+        self.rect.bottom = min(self.rect.bottom, self.world.height)
         self.rect.top = max(self.rect.top, 0)
 
     def is_player_collide_wall(self):
         """Determine wall collision state."""
-        for wll in walls:
-            if self.rect.colliderect(wll):  # type: ignore
-                return True
-        return False
+        return self.world.wall_grid.is_blocked(
+            (self.rect.x // self.speedx, self.rect.y // self.speedy)
+        )
 
     def update(self):
         """Implement agent's hybrid logic."""
         my_pos, their_pos = self._update_players_pos()
-        their_parts = [part for part in PlayerB.PART_LIST if their_pos in part]
+        excluded = self._excluded_partitions(their_pos)
 
         # print excluded partitions
-        # print(their_parts)
-
-        target_coins = self._translate_coins(their_parts)
-
-        if not target_coins:
-            return
-
-        goal, visited, next_pos = self.find_path(target_coins, my_pos)
-
-        # backtrace to construct path
-        path = [next_pos]
-        while next_pos != my_pos:
-            next_pos = visited[next_pos]
-            path.append(next_pos)
-
-        while path and goal in target_coins:
+        # print([part for i, part in enumerate(self.part_list) if excluded >> i & 1])
+
+        if self.deadline:
+            # the best target changes with the clock, so these paths are not cached
+            plan = self._deadline_plan(my_pos, self._translate_coins(excluded))
+            if plan is None:
+                return
+            goal, path = plan
+        elif self.distances:
+            target_coins = self._translate_coins(excluded)
+            c_dist = self.distances.field(my_pos)[
+                target_coins[:, 0], target_coins[:, 1]
+            ]
+            reachable = c_dist != UNREACHABLE
+            if not reachable.any():
+                return
+            # the closest reachable coin; ties go to the coin that spawned first
+            c_dist = np.where(reachable, c_dist, np.iinfo(c_dist.dtype).max)
+            goal = tuple(target_coins[c_dist.argmin()].tolist())
+            next_pos = self.distances.next_step(my_pos, goal)
+            path = [next_pos, my_pos] if next_pos else []
+        else:
+            # reuse the path found on an earlier frame unless it went stale
+            found = self.path_cache.get(my_pos, excluded)
+            if found is None:
+                target_coins = self._translate_coins(excluded)
+                if not len(target_coins):
+                    return
+                found = self.find_path(target_coins, my_pos)
+                if found.goal is None:
+                    return
+                self.path_cache.put(my_pos, excluded, found)
+            goal = found.goal
+            path = [*reversed(found.path), my_pos]
+
+        while path and self.world.coins.value_grid[goal]:
             cmp_pos = path.pop()
             rel_x = cmp_pos[0] - my_pos[0]
             rel_y = cmp_pos[1] - my_pos[1]
@@ -397,54 +443,39 @@ class PlayerB(pygame.sprite.Sprite):
                 case (0, -1):
                     self.move(Movement.UP)
 
-            # update to make sure target coin still exists
-            target_coins = self._translate_coins(their_parts)
-
-    def find_path(
-        self, target_coins: list[Location], my_pos: Location
-    ) -> tuple[Location, dict[Location, Location], Location]:
-        """Return path via modified Astar."""
-        # frontier: (priority, current_pos, prev_pos)
-        frontier: list[tuple[int, Location, Location]] = []
-        visited: dict[Location, Location] = {}
-
-        heapq.heappush(frontier, (0, my_pos, my_pos))
-        # Get the path to the coin
-        while frontier:
-            current = heapq.heappop(frontier)
-
-            for mov_dir in Movement:
-                next_pos = (
-                    current[1][0] + mov_dir.value[0],
-                    current[1][1] + mov_dir.value[1],
-                )
-
-                if (
-                    -1 in next_pos
-                    or next_pos[0] > WIDTH // self.speedx
-                    or next_pos[1] > HEIGHT // self.speedy
-                ):
-                    continue
-
-                if next_pos in visited.values():
-                    continue
-                if next_pos in self.WALL_POS:
-                    continue
-                if next_pos in target_coins:
-                    visited[next_pos] = current[1]
-                    return next_pos, visited, next_pos
-                if current[0] == 10:
-                    visited[next_pos] = current[1]
-                    return next_pos, visited, next_pos
-
-                heapq.heappush(
-                    frontier,
-                    (
-                        current[0] + 1,
-                        next_pos,
-                        current[1],
-                    ),
-                )
-                visited[next_pos] = current[1]
-
-        return my_pos, visited, my_pos
+    def _deadline_plan(
+        self, my_pos: Location, target_coins: np.ndarray
+    ) -> tuple[Location, list[Location]] | None:
+        """Return the goal of deadline targeting and the path to it, or None."""
+        if not len(target_coins):
+            return None
+        if self.distances:
+            field = self.distances.field(my_pos)
+        else:
+            field = self.search.distance_field(my_pos, max_depth=self.search_depth)
+        c_x, c_y = target_coins.T
+        best = deadline_choice(
+            field[c_x, c_y],
+            self.world.coins.value_grid[c_x, c_y],
+            self.world.life_grid()[c_x, c_y],
+            self.search_depth,
+        )
+        if best is None:
+            return None
+
+        goal = (int(c_x[best]), int(c_y[best]))
+        if self.distances:
+            next_pos = self.distances.next_step(my_pos, goal)
+            return goal, [next_pos, my_pos] if next_pos else []
+        return goal, [*reversed(self.search.path_to(goal)), my_pos]
+
+    def on_coin(self, change: str, coin):
+        """Drop the cached paths that a coin spawn, pickup or expiry made stale."""
+        if change == "add":
+            self.path_cache.drop_closer(coin.cell)
+        elif coin.cell not in self.world.coins.by_pos:
+            self.path_cache.drop_goal(coin.cell)
+
+    def find_path(self, target_coins: np.ndarray, my_pos: Location) -> SearchResult:
+        """Return the path to the closest target coin via breadth-first search."""
+        return self.search.bfs(my_pos, target_coins, self.search_depth)
@@ -0,0 +1,153 @@
+"""distance_table.py: All-pairs shortest paths over a static wall layout.
+
+Walls never change during a game, so the true path distance between every pair of
+cells, and the first move along a shortest path, can be computed once per world.
+Agents then read distances to coins and their next move in O(1) instead of
+searching on every `update()`.
+
+The table holds N^4 entries: about 29 KB at N = 11 and 13 MB at N = 51.
+"""
+
+import hashlib
+import os
+import tempfile
+import zipfile
+from collections import OrderedDict
+
+import numpy as np
+
+from grid import Location, WallGrid
+
+# Moves in the order of `compAgent.Movement`: UP, DOWN, LEFT, RIGHT.
+MOVES = ((0, -1), (0, 1), (-1, 0), (1, 0))
+UNREACHABLE = -1
+CACHE_DIR = ".cache"
+
+
+class DistanceTable:
+    """Shortest path distances and next hops between all cells of a grid.
+
+    `dist[sx, sy, tx, ty]` is the number of moves from (sx, sy) to (tx, ty), or
+    `UNREACHABLE`. `hop[sx, sy, tx, ty]` is the index in `MOVES` of the first move
+    on a shortest path, or -1 when there is none (same cell or unreachable).
+    """
+
+    # tables kept in memory per process, least recently used first
+    MAX_LOADED = 8
+    _loaded: OrderedDict[str, "DistanceTable"] = OrderedDict()
+
+    def __init__(self, dist: np.ndarray, hop: np.ndarray):
+        """Wrap precomputed distance and next-hop arrays."""
+        self.n = dist.shape[0]
+        self.dist = dist
+        self.hop = hop
+
+    @classmethod
+    def build(cls, grid: WallGrid) -> "DistanceTable":
+        """Run a breadth-first search from every cell at once."""
+        n = grid.n
+        free = ~grid.blocked
+        dist = np.full((n, n, n, n), UNREACHABLE, dtype=np.int16)
+
+        # frontier[sx, sy] holds the cells reached from (sx, sy) at the current depth
+        frontier = np.zeros((n, n, n, n), dtype=bool)
+        sources = np.argwhere(free)
+        frontier[sources[:, 0], sources[:, 1], sources[:, 0], sources[:, 1]] = True
+        depth = 0
+        while frontier.any():
+            dist[frontier] = depth
+            depth += 1
+            reached = np.zeros_like(frontier)
+            reached[..., 1:, :] |= frontier[..., :-1, :]
+            reached[..., :-1, :] |= frontier[..., 1:, :]
+            reached[..., :, 1:] |= frontier[..., :, :-1]
+            reached[..., :, :-1] |= frontier[..., :, 1:]
+            frontier = reached & free & (dist == UNREACHABLE)
+
+        # the first move goes to the neighbour that is one step closer to the target
+        hop = np.full((n, n, n, n), -1, dtype=np.int8)
+        for move, (dx, dy) in reversed(list(enumerate(MOVES))):
+            src_x = slice(max(0, -dx), n - max(0, dx))
+            src_y = slice(max(0, -dy), n - max(0, dy))
+            nbr_x = slice(max(0, dx), n - max(0, -dx))
+            nbr_y = slice(max(0, dy), n - max(0, -dy))
+            src = dist[src_x, src_y]
+            closer = (dist[nbr_x, nbr_y] == src - 1) & (src > 0)
+            hop[src_x, src_y][closer] = move
+
+        return cls(dist, hop)
+
+    @classmethod
+    def cached(cls, grid: WallGrid, cache_dir: str | None = CACHE_DIR):
+        """Return the table for `grid`, loading or saving it under `cache_dir`.
+
+        Tables are keyed by a hash of the wall layout, which covers the seed and N.
+        Pass `cache_dir=None` to keep tables in memory only. The last `MAX_LOADED`
+        tables stay in memory; files are written to a temporary name and renamed,
+        so processes building the same table never read a partial file.
+        """
+        key = hashlib.sha1(grid.blocked.tobytes()).hexdigest()[:16]
+        key = f"distance_{grid.n}_{key}"
+        table = cls._loaded.get(key)
+        if table is not None:
+            cls._loaded.move_to_end(key)
+            return table
+
+        path = os.path.join(cache_dir, f"{key}.npz") if cache_dir else None
+        table = cls._load(path) if path else None
+        if table is None:
+            table = cls.build(grid)
+            if path:
+                table.save(path)
+
+        cls._loaded[key] = table
+        if len(cls._loaded) > cls.MAX_LOADED:
+            cls._loaded.popitem(last=False)
+        return table
+
+    @classmethod
+    def _load(cls, path: str) -> "DistanceTable | None":
+        """Read a table written by `save`, or return None if it is missing or bad."""
+        try:
+            with np.load(path) as data:
+                return cls(data["dist"], data["hop"])
+        except (OSError, EOFError, KeyError, ValueError, zipfile.BadZipFile):
+            return None
+
+    def save(self, path: str):
+        """Write the table to an .npz file, replacing it atomically."""
+        cache_dir = os.path.dirname(path) or "."
+        os.makedirs(cache_dir, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=cache_dir, suffix=".npz.tmp", delete=False
+        ) as out:
+            try:
+                np.savez_compressed(out, dist=self.dist, hop=self.hop)
+            except BaseException:
+                out.close()
+                os.unlink(out.name)
+                raise
+        os.replace(out.name, path)
+
+    def distance(self, src: Location, dst: Location) -> int:
+        """Return the path distance from `src` to `dst`, or `UNREACHABLE`."""
+        return int(self.dist[src[0], src[1], dst[0], dst[1]])
+
+    def field(self, src: Location) -> np.ndarray:
+        """Return the distances from `src` to every cell as an [x, y] view."""
+        return self.dist[src[0], src[1]]
+
+    def next_step(self, src: Location, dst: Location) -> Location | None:
+        """Return the first cell on a shortest path from `src` to `dst`."""
+        move = self.hop[src[0], src[1], dst[0], dst[1]]
+        if move < 0:
+            return None
+        return (src[0] + MOVES[move][0], src[1] + MOVES[move][1])
+
+    def path(self, src: Location, dst: Location) -> list[Location]:
+        """Return the cells after `src` on a shortest path to `dst`."""
+        path: list[Location] = []
+        while (nxt := self.next_step(src, dst)) is not None:
+            path.append(nxt)
+            src = nxt
+        return path
@@ -0,0 +1,166 @@
+"""engine.py: Play matches headless on a logical tick clock.
+
+The engine plays the same rules as `main.py` (see `env.Environment.step`), but instead
+of waiting on `clock.tick(FPS)` it advances the world's `logical_time` by one tick per
+frame, so a match runs as fast as the CPU allows and no window is opened.
+"""
+
+import argparse
+import random
+from typing import Callable
+
+import env
+from compAgent import PlayerA, PlayerB
+from distance_table import DistanceTable
+from planner import RolloutPlanner
+from profiler import AgentProfiler
+from randomAgent import randPlayer
+from replay import ReplayRecorder
+from rl import QAgent
+
+# Frames played by `main.py`: the loop runs until the clock passes `SEC` seconds,
+# and the frame that crosses the limit is still played.
+MAX_TICKS = env.SEC * env.FPS + 1
+
+AGENT_COLORS = (env.BLUE, env.YELLOW, env.RED, env.GREEN)
+
+# Agent factories, called with the player slot (0, 1, ...) like the cases in `main.py`
+# and the world to play in (default: `env.world`).
+AGENTS = {
+    "PlayerA": lambda slot, world=env.world: PlayerA(world=world),
+    "PlayerB": lambda slot, world=env.world: PlayerB(world=world),
+    "PlayerA-table": lambda slot, world=env.world: PlayerA(
+        DistanceTable.cached(world.wall_grid), world
+    ),
+    "PlayerB-table": lambda slot, world=env.world: PlayerB(
+        DistanceTable.cached(world.wall_grid), world
+    ),
+    "PlayerA-deadline": lambda slot, world=env.world: PlayerA(
+        world=world, deadline=True
+    ),
+    "PlayerB-deadline": lambda slot, world=env.world: PlayerB(
+        world=world, deadline=True
+    ),
+    "Planner": lambda slot, world=env.world: RolloutPlanner(world=world),
+    "QAgent": lambda slot, world=env.world: QAgent(world=world),
+    "randPlayer": lambda slot, world=env.world: randPlayer(
+        world.rand_agent_path(slot), AGENT_COLORS[slot % len(AGENT_COLORS)], world
+    ),
+}
+
+
+def run_game(
+    agents,
+    ticks: int = MAX_TICKS,
+    on_tick: Callable[[int], None] | None = None,
+    world: env.Environment | None = None,
+) -> list[int]:
+    """Play a full match between any number of agents and return their scores.
+
+    `on_tick`, if given, is called with the tick number after every frame. Agents
+    with a `close` method (e.g. a `RolloutPlanner` with a process pool) are closed
+    when the match ends.
+    """
+    world = world if world is not None else env.world
+    world.reset()
+    world.add_agents(*agents)
+
+    try:
+        for tick in range(1, ticks + 1):
+            world.logical_time = tick * world.config.tick_ms
+            world.step(*agents)
+            if on_tick:
+                on_tick(tick)
+    finally:
+        world.reset()
+        for agent in agents:
+            if hasattr(agent, "close"):
+                agent.close()
+
+    return [agent.score for agent in agents]
+
+
+def run_match(
+    player1,
+    player2,
+    ticks: int = MAX_TICKS,
+    on_tick: Callable[[int], None] | None = None,
+    world: env.Environment | None = None,
+) -> tuple[int, int]:
+    """Play a full match between two agents in `world` and return their scores."""
+    score1, score2 = run_game([player1, player2], ticks, on_tick, world)
+    return score1, score2
+
+
+def agent_name(name: str) -> str:
+    """Check that `name` is one of `AGENTS`, for argparse."""
+    if name not in AGENTS:
+        raise argparse.ArgumentTypeError(
+            f"unknown agent {name!r}, expected one of {sorted(AGENTS)}"
+        )
+    return name
+
+
+def main():
+    """Play a single headless match from the command line."""
+    parser = argparse.ArgumentParser(
+        description="play a headless tileworld match",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "players",
+        type=agent_name,
+        nargs="*",
+        default=["PlayerA", "PlayerB"],
+        help="agents to play, two or more",
+    )
+    parser.add_argument("-t", "--ticks", type=int, default=MAX_TICKS)
+    parser.add_argument("-s", "--seed", type=int, default=env.SEED)
+    parser.add_argument("-n", "--size", type=int, default=env.N, help="board size N")
+    parser.add_argument(
+        "--compact", action="store_true", help="keep coins and walls as arrays"
+    )
+    parser.add_argument("-r", "--replay", help="record the match to this file")
+    parser.add_argument(
+        "-p", "--profile", help="write agent latencies to this .csv or .json file"
+    )
+    parser.add_argument(
+        "-b", "--budget", type=float, help="per-update time budget in milliseconds"
+    )
+    args = parser.parse_args()
+
+    world = env.world
+    if (args.seed, args.size, args.compact) != (env.SEED, env.N, False):
+        world = env.Environment(
+            env.WorldConfig(args.seed, args.size, compact=args.compact)
+        )
+
+    random.seed(1)
+    agents = [AGENTS[name](slot, world) for slot, name in enumerate(args.players)]
+    recorder = None
+    if args.replay:
+        recorder = ReplayRecorder(
+            agents,
+            world.coins,
+            world.wall_grid,
+            world.config.tick_ms,
+            world.seed,
+        )
+    profiler = None
+    if args.profile or args.budget is not None:
+        profiler = AgentProfiler(agents, args.budget)
+    scores = run_game(agents, args.ticks, recorder.on_tick if recorder else None, world)
+    if recorder:
+        recorder.save(args.replay)
+    if profiler:
+        profiler.detach()
+        print(profiler.report())
+        if args.profile:
+            profiler.write(args.profile)
+
+    for slot, score in enumerate(scores, start=1):
+        print(f"Score of Player {slot}:", score)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,21 @@
+import heapq
 import pygame
 import random
 import numpy as np
 import os
+from dataclasses import dataclass
+from types import MappingProxyType
+
+import render
+import worldgen
+from grid import WallGrid
 
 SEED = 0
 SEC = 12  # Total game time in seconds. You may change it to a larger value to make the game runs longer
 FPS = 10  # You may accelerate the game by changing it to a larger number, and decelerate it to debug
 total_time = SEC * 1000  # Pygame runs in millisecond
 global_time = 0
+TICK_MS = 1000 // FPS  # Length of one logical tick (frame) in milliseconds
 
 # Colors
 RED = (255, 0, 0)
@@ -31,8 +39,6 @@ WIDTH = HEIGHT = WALLSIZE * N
 
 # Number of walls
 WALLNUM = N
-np.random.seed(SEED)
-wall_pos = np.random.randint(1, N - 1, size=(WALLNUM, 2))
 
 # Total number of coins
 COINNUM = 10000
@@ -46,89 +52,675 @@ STEPNUM = N * N * 2
 ##############################
 ## DO NOT CHANGE BELOW THIS ##
 ##############################
-# random agent path : DONOT CHANGE THIS
-np.random.seed(SEED)
-randAgentPath = np.random.randint(4, size=STEPNUM * 10)
-np.random.seed(SEED + 200)
-randAgentPath1 = np.random.randint(4, size=STEPNUM * 10)
+# The game window is opened by `main.py` with `render.open_window`; images are only
+# loaded (see `render.load`) when a sprite is first drawn, so headless runs never
+# touch the display, the mixer or the image files.
 
 
-# Initialize game and create window : DONOT CHANGE THIS
-pygame.init()
-pygame.mixer.init()  # initialize sound
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Multi-Agent Simulator")
+def get_ticks():
+    """Return the game time of the default world in milliseconds."""
+    return world.get_ticks()
 
-# Load images
-wall_img = pygame.image.load(os.path.join("img", "wall.png")).convert()
-coin_imgs = []
-for i in range(1, 10):
-    coin_imgs.append(pygame.image.load(os.path.join("img", f"coin{i}.png")).convert())
 
 # Game objects
 class Wall(pygame.sprite.Sprite):
+    image = render.LazyImage()
+
     def __init__(self, pos_x, pos_y):
         pygame.sprite.Sprite.__init__(self)
-        self.image = wall_img
-        self.image = pygame.transform.scale(wall_img, (WALLSIZE, WALLSIZE))
-        self.image.set_colorkey(BLACK)
-        self.rect = self.image.get_rect()  # get image position
+        self.rect = pygame.Rect(0, 0, WALLSIZE, WALLSIZE)  # get image position
         self.rect.x = pos_x * WALLSIZE  # random.randrange(1, N-1) * WALLSIZE
         self.rect.y = pos_y * WALLSIZE  # random.randrange(1, N-1) * WALLSIZE
         # if self.rect.x == 0 and self.rect.y == 0:
         #     self.rect.x = random.randrange(0, N) * WALLSIZE
         #     self.rect.y = random.randrange(0, N) * WALLSIZE
 
+    def build_image(self):
+        return render.load("wall.png", WALLSIZE, BLACK)
+
 
 class Coin(pygame.sprite.Sprite):
-    def __init__(self, pos_x, pos_y, val, coin_life):
+    image = render.LazyImage()
+
+    def __init__(self, pos_x, pos_y, val, coin_life, clock=None):
         pygame.sprite.Sprite.__init__(self)
+        self.clock = clock or get_ticks  # game clock of the coin's world
         self.value = val  # random.randrange(1, 10)
-        self.image = coin_imgs[self.value - 1]
-        self.image = pygame.transform.scale(self.image, (WALLSIZE, WALLSIZE))
-        self.image.set_colorkey(BLACK)
-        self.rect = self.image.get_rect()  # get image position
+        self.rect = pygame.Rect(0, 0, WALLSIZE, WALLSIZE)  # get image position
         self.rect.x = pos_x * WALLSIZE  # random.randrange(1, N-1) * WALLSIZE
         self.rect.y = pos_y * WALLSIZE  # random.randrange(1, N-1) * WALLSIZE
-        self.coin_start = pygame.time.get_ticks()
+        self.cell = (pos_x, pos_y)
+        self.coin_start = self.clock()
         self.coin_lifespan = coin_life * 1000
+        self.expires_at = self.coin_start + self.coin_lifespan
+
+    def build_image(self):
+        # one pre-scaled surface per coin value, shared by every coin
+        return render.load(f"coin{self.value}.png", WALLSIZE, BLACK)
+
+    def is_expired(self):
+        """Check if the coin has outlived its lifespan."""
+        return self.clock() > self.expires_at
 
     def update(self):
-        if pygame.time.get_ticks() > self.coin_start + self.coin_lifespan:
+        # Environment.step expires coins through its expiry heap instead
+        if self.is_expired():
             self.kill()
 
 
-np.random.seed(SEED)
-coin_pos = np.random.randint(0, N, size=(COINNUM, 2))
-coin_val = np.random.randint(1, 10, size=(COINNUM, 1))
-coin_life = np.random.randint(1, 5, size=(COINNUM, 1))
-coin_arr = np.concatenate((coin_pos, coin_val, coin_life), axis=1)
-coin_arr = coin_arr.tolist()
+class CoinIndex:
+    """Indexes of the coins on the board by cell, updated on every coin change.
+
+      - `by_pos`: read-only mapping (x, y) -> total value of the coins on that cell
+      - `value_grid`: read-only N x N array of the same values, indexed [x, y]
+      - `expiry_grid`: read-only N x N array of the clock time at which the first
+        coin on each cell expires (`NO_EXPIRY` on empty cells)
+    The grids and `by_pos` are live views; copy them to keep a snapshot. Every
+    callable in `listeners` is called with ("add" | "remove", coin) on every change,
+    e.g. to record replays or invalidate cached paths.
+    """
+
+    NO_EXPIRY = np.iinfo(np.int64).max
+
+    def __init__(self, n):
+        self.listeners = []
+        self._by_pos = {}
+        self._value_grid = np.zeros((n, n), dtype=int)
+        self._expiry_grid = np.full((n, n), self.NO_EXPIRY, dtype=np.int64)
+        self.by_pos = MappingProxyType(self._by_pos)
+        self.value_grid = self._value_grid.view()
+        self.value_grid.flags.writeable = False
+        self.expiry_grid = self._expiry_grid.view()
+        self.expiry_grid.flags.writeable = False
+
+    def _index_add(self, cell, value, expires_at):
+        self._value_grid[cell] += value
+        self._by_pos[cell] = self._by_pos.get(cell, 0) + value
+        self._expiry_grid[cell] = min(self._expiry_grid[cell], expires_at)
+
+    def _index_remove(self, cell, value, first_expiry):
+        self._value_grid[cell] -= value
+        if self._value_grid[cell]:
+            self._by_pos[cell] -= value
+        else:
+            del self._by_pos[cell]
+        self._expiry_grid[cell] = first_expiry
+
+    def _notify(self, change, coin):
+        for listener in self.listeners:
+            listener(change, coin)
+
+
+class CoinGroup(pygame.sprite.Group, CoinIndex):
+    """Group of coin sprites that keeps the `CoinIndex` of their values by cell.
+
+    The index is updated whenever a coin joins or leaves the group (spawn, pickup
+    and expiry all go through `add_internal`/`remove_internal`), so agents can read
+    it every frame without rebuilding anything. `coins_at(cell)` returns the coin
+    sprites on a cell, in spawn order.
+    """
+
+    def __init__(self, n):
+        pygame.sprite.Group.__init__(self)
+        CoinIndex.__init__(self, n)
+        self._sprites_by_pos = {}
+
+    def add_internal(self, sprite, layer=None):
+        pygame.sprite.Group.add_internal(self, sprite, layer)
+        self._sprites_by_pos.setdefault(sprite.cell, []).append(sprite)
+        self._index_add(sprite.cell, sprite.value, sprite.expires_at)
+        self._notify("add", sprite)
+
+    def remove_internal(self, sprite):
+        pygame.sprite.Group.remove_internal(self, sprite)
+        on_cell = self._sprites_by_pos[sprite.cell]
+        on_cell.remove(sprite)
+        if not on_cell:
+            del self._sprites_by_pos[sprite.cell]
+        first_expiry = min(
+            (coin.expires_at for coin in on_cell), default=self.NO_EXPIRY
+        )
+        self._index_remove(sprite.cell, sprite.value, first_expiry)
+        self._notify("remove", sprite)
+
+    def coins_at(self, cell):
+        """Return the coins on `cell`, in the order they joined the group."""
+        return list(self._sprites_by_pos.get(cell, ()))
+
+    def collect(self, cell):
+        """Remove the coins on `cell` and return their total value."""
+        total = 0
+        for coin in self.coins_at(cell):
+            total += coin.value
+            coin.kill()
+        return total
+
+    def discard_on(self, wall_grid):
+        """Remove the coins on walls and return the set of their cells."""
+        hit_cells = set()
+        for coin in self.sprites():
+            if wall_grid.is_wall(coin.cell):
+                hit_cells.add(coin.cell)
+                coin.kill()
+        return hit_cells
+
+
+class CoinRecord:
+    """A coin of a `CoinTable`, made on demand from one row of its columns.
+
+    Records compare equal by spawn number, so a listener can match a coin's removal
+    to its spawn, and have the `image` and `rect` of a `Coin` sprite for drawing.
+    """
+
+    __slots__ = ("number", "cell", "value", "expires_at", "clock")
+
+    def __init__(self, number, cell, value, expires_at, clock):
+        self.number = number
+        self.cell = cell
+        self.value = value
+        self.expires_at = expires_at
+        self.clock = clock
+
+    def __eq__(self, other):
+        return isinstance(other, CoinRecord) and other.number == self.number
+
+    def __hash__(self):
+        return hash(self.number)
+
+    @property
+    def image(self):
+        return render.load(f"coin{self.value}.png", WALLSIZE, BLACK)
+
+    @property
+    def rect(self):
+        x, y = self.cell
+        return pygame.Rect(x * WALLSIZE, y * WALLSIZE, WALLSIZE, WALLSIZE)
+
+    def is_expired(self):
+        """Check if the coin has outlived its lifespan."""
+        return self.clock() > self.expires_at
+
+    def sprite(self):
+        """Return the coin as a `Coin` sprite with the same deadline."""
+        coin = Coin(*self.cell, self.value, 0, clock=self.clock)
+        coin.coin_lifespan = self.expires_at - coin.coin_start
+        coin.expires_at = self.expires_at
+        return coin
+
+
+class CoinTable(CoinIndex):
+    """Coins of a compact world, held as NumPy columns in cell units.
+
+    Every coin has a row in the `x`, `y`, `value`, `expires_ms` (deadline on the
+    world clock in milliseconds, like `Coin.expires_at`) and `number` (spawn number)
+    columns, in spawn order, so a coin costs a few bytes instead of a sprite, a rect
+    and group bookkeeping. A removed coin leaves a hole (value 0) until the columns
+    fill up and are compacted. Deadlines are kept in a heap, so expiring coins only
+    touches the coins that are due. The `CoinIndex` is kept like `CoinGroup` keeps
+    it; listeners, `coins_at` and iteration get `CoinRecord`s, and `sprites()` makes
+    `Coin` sprites only to draw.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, n, clock):
+        CoinIndex.__init__(self, n)
+        self.clock = clock
+        self.count = 0  # live coins
+        self.rows = 0  # rows in use, holes included
+        self.spawned = 0
+        coord = np.int16 if n <= np.iinfo(np.int16).max else np.int32
+        self.x = np.zeros(n, dtype=coord)
+        self.y = np.zeros(n, dtype=coord)
+        self.value = np.zeros(n, dtype=np.int8)
+        self.expires_ms = np.zeros(n, dtype=np.int64)
+        self.number = np.zeros(n, dtype=np.int64)
+        self._deadlines = []  # heap of (expires_ms, number), removed coins included
+        self._numbers_by_pos = {}
+
+    def _columns(self):
+        return ("x", "y", "value", "expires_ms", "number")
+
+    def _record(self, row):
+        return CoinRecord(
+            int(self.number[row]),
+            (int(self.x[row]), int(self.y[row])),
+            int(self.value[row]),
+            int(self.expires_ms[row]),
+            self.clock,
+        )
+
+    def _row(self, number):
+        """Return the row of the live coin with spawn number `number`, or None."""
+        row = int(np.searchsorted(self.number[: self.rows], number))
+        if row < self.rows and self.number[row] == number and self.value[row]:
+            return row
+        return None
+
+    def _live_rows(self):
+        return np.flatnonzero(self.value[: self.rows])
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return iter([self._record(row) for row in self._live_rows().tolist()])
+
+    def _make_room(self):
+        """Compact the columns if half of them are holes, else double them."""
+        if 2 * self.count <= self.rows:
+            live = self._live_rows()
+            for name in self._columns():
+                column = getattr(self, name)
+                column[: self.count] = column[live]
+            self.rows = self.count
+            return
+        for name in self._columns():
+            column = getattr(self, name)
+            setattr(self, name, np.concatenate((column, np.zeros_like(column))))
+
+    def spawn(self, pos_x, pos_y, val, coin_life):
+        """Add a coin that expires `coin_life` seconds from now, like `Coin`."""
+        if self.rows == len(self.x):
+            self._make_room()
+        row, number = self.rows, self.spawned
+        expires_ms = self.clock() + coin_life * 1000
+        self.x[row], self.y[row], self.value[row] = pos_x, pos_y, val
+        self.expires_ms[row], self.number[row] = expires_ms, number
+        self.rows += 1
+        self.count += 1
+        self.spawned += 1
+        heapq.heappush(self._deadlines, (expires_ms, number))
+        self._numbers_by_pos.setdefault((pos_x, pos_y), []).append(number)
+        self._index_add((pos_x, pos_y), val, expires_ms)
+        if self.listeners:
+            self._notify("add", self._record(row))
+
+    def _discard(self, rows):
+        """Remove the coins in `rows` and return their cells in order."""
+        cells = []
+        for row in rows:
+            record = self._record(row)
+            self.value[row] = 0
+            self.count -= 1
+            on_cell = self._numbers_by_pos[record.cell]
+            on_cell.remove(record.number)
+            if on_cell:
+                first_expiry = min(
+                    int(self.expires_ms[self._row(number)]) for number in on_cell
+                )
+            else:
+                del self._numbers_by_pos[record.cell]
+                first_expiry = self.NO_EXPIRY
+            self._index_remove(record.cell, record.value, first_expiry)
+            self._notify("remove", record)
+            cells.append(record.cell)
+        return cells
+
+    def _rows_at(self, cell):
+        return [self._row(number) for number in self._numbers_by_pos.get(cell, ())]
+
+    def coins_at(self, cell):
+        """Return the coins on `cell`, in spawn order."""
+        return [self._record(row) for row in self._rows_at(cell)]
+
+    def collect(self, cell):
+        """Remove the coins on `cell` and return their total value."""
+        rows = self._rows_at(cell)
+        total = int(self.value[rows].sum())
+        self._discard(rows)
+        return total
+
+    def discard_on(self, wall_grid):
+        """Remove the coins on walls and return the set of their cells."""
+        rows = self._live_rows()
+        hit = wall_grid.blocked[self.x[rows], self.y[rows]]
+        return set(self._discard(rows[hit].tolist()))
+
+    def expire(self, now):
+        """Remove the coins whose deadline is before `now`, by deadline."""
+        heap = self._deadlines
+        while heap and heap[0][0] < now:
+            row = self._row(heapq.heappop(heap)[1])
+            if row is not None:
+                self._discard([row])
+
+    def clear(self):
+        """Remove every coin."""
+        self._discard(self._live_rows().tolist())
+        self.rows = 0
+        self._deadlines = []
+
+    def sprites(self):
+        """Return the coins as new `Coin` sprites, e.g. to draw them."""
+        return [record.sprite() for record in self]
+
+    def draw(self, surface):
+        """Draw the coins on `surface` like `pygame.sprite.Group.draw`."""
+        return pygame.sprite.Group(self.sprites()).draw(surface)
+
 
-all_sprites = pygame.sprite.Group()
-players = pygame.sprite.Group()
-walls = pygame.sprite.Group()
-coins = pygame.sprite.Group()
+@dataclass(frozen=True)
+class WorldConfig:
+    """Parameters of a world; the defaults are the module constants above."""
+
+    seed: int = SEED
+    n: int = N
+    sec: int = SEC
+    fps: int = FPS
+    coinnum: int = COINNUM
+    wallnum: int | None = None  # defaults to `n`, like WALLNUM
+    # keep coins in a `CoinTable` and make wall sprites only when drawn (headless)
+    compact: bool = False
+
+    def __post_init__(self):
+        if self.wallnum is None:
+            object.__setattr__(self, "wallnum", self.n)
+
+    @property
+    def tick_ms(self) -> int:
+        """Length of one logical tick in milliseconds."""
+        return 1000 // self.fps
+
+    @property
+    def max_ticks(self) -> int:
+        """Frames in a full match, counting the one that crosses `sec`."""
+        return self.sec * self.fps + 1
+
+    @property
+    def stepnum(self) -> int:
+        """Length scale of the random agents' paths, like STEPNUM."""
+        return self.n * self.n * 2
+
+
+class Environment:
+    """One world: its sprite groups, walls, coin schedule and game clock.
+
+    Worlds only share pygame and the loaded images, so several of them can live in
+    one process, each built from its own `WorldConfig`. The module level names
+    (`all_sprites`, `coins`, `step_world`, ...) belong to the default `world`.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, config: WorldConfig | None = None):
+        """Create the sprite groups and generate the world of `config.seed`."""
+        self.config = config or WorldConfig()
+        self.n = self.config.n
+        self.width = self.height = WALLSIZE * self.n
+        self.all_sprites = pygame.sprite.Group()
+        self.players = pygame.sprite.Group()
+        self.walls = pygame.sprite.Group()
+        if self.config.compact:
+            self.coins = CoinTable(self.n, self.get_ticks)
+        else:
+            self.coins = CoinGroup(self.n)
+        self.wall_grid = WallGrid(self.n)  # occupancy grid of `walls`
+
+        # Logical game clock in milliseconds. Headless engines set this and advance
+        # it by one tick per frame; while it is None the world follows pygame's clock.
+        self.logical_time = None
+        self.coin_queue = None
+        # (expires_at, spawn number, coin) of the coins on the board; coins that
+        # left early stay in the heap until their deadline passes
+        self.expiry_heap = []
+        self.spawned = 0
+
+        # Agents of the current match in scoring order, their slots, and their cells
+        # as (x, y) rows. A row is refreshed right after its agent's `update()`, so
+        # later agents see the moves made earlier in the same frame.
+        self.agents = []
+        self.agent_slots = {}
+        self.agent_cells = np.zeros((0, 2), dtype=int)
+        self.generate(self.config.seed)
+
+    def get_ticks(self):
+        """Return the game time in milliseconds (logical when running headless)."""
+        if self.logical_time is None:
+            return pygame.time.get_ticks()
+        return self.logical_time
+
+    def generate(self, seed):
+        """Build the walls, coin schedule and random agent paths for `seed`.
+
+        Players and coins are removed from the previous world; the sprite groups and
+        wall grid are reused, so existing references see the new world.
+        """
+        config = self.config
+        self.seed = seed
+        self.wall_pos = worldgen.wall_positions(seed, self.n, config.wallnum)
+
+        # random agent path : DONOT CHANGE THIS (generated on first use)
+        self._rand_agent_paths = None
+
+        # coins still to spawn
+        self.coin_queue = worldgen.CoinSchedule(seed, self.n, config.coinnum)
+        self.coin_arr = self.coin_queue.blocks[0]
+
+        self.reset()
+        for wall in self.walls:
+            wall.kill()
+        if not config.compact:
+            self._add_walls()
+        self.wall_grid.rebuild(self.wall_pos)
+
+    def _add_walls(self):
+        for pos_x, pos_y in self.wall_pos:
+            wall = Wall(pos_x, pos_y)
+            if wall not in self.walls:
+                self.all_sprites.add(wall)
+                self.walls.add(wall)
+
+    def wall_sprites(self):
+        """Return the `walls` group, making the sprites of a compact world's walls."""
+        if self.config.compact and not self.walls:
+            self._add_walls()
+        return self.walls
+
+    @property
+    def rand_agent_paths(self):
+        """The move sequences of the two random agents, generated on first use."""
+        if self._rand_agent_paths is None:
+            self._rand_agent_paths = worldgen.random_agent_paths(
+                self.seed, self.config.stepnum
+            )
+        return self._rand_agent_paths
+
+    def rand_agent_path(self, slot):
+        """Return the move sequence of the random agent in `slot`.
+
+        Slots 0 and 1 follow `randAgentPath` and `randAgentPath1`; further slots get
+        their own paths, seeded by (seed, slot).
+        """
+        if slot < len(self.rand_agent_paths):
+            return self.rand_agent_paths[slot]
+        rng = np.random.default_rng((self.seed, slot))
+        return rng.integers(4, size=self.config.stepnum * 10)
+
+    def add_agents(self, *agents):
+        """Add agents to the match; pickups are scored in the order they were added.
+
+        Agents with an `on_coin(change, coin)` method hear every coin change (see
+        `CoinGroup`) until the world is reset.
+        """
+        for agent in agents:
+            if agent in self.agent_slots:
+                continue
+            self.agent_slots[agent] = len(self.agents)
+            self.agents.append(agent)
+            self.all_sprites.add(agent)
+            self.players.add(agent)
+            if hasattr(agent, "on_coin"):
+                self.coins.listeners.append(agent.on_coin)
+        self.agent_cells = np.array(
+            [self._cell_of(agent) for agent in self.agents], dtype=int
+        ).reshape(-1, 2)
+
+    def opponent_cells(self, agent):
+        """Return the cells of every agent except `agent` as (x, y) rows."""
+        slot = self.agent_slots.get(agent)
+        if slot is None:
+            return self.agent_cells.copy()
+        return np.concatenate((self.agent_cells[:slot], self.agent_cells[slot + 1 :]))
+
+    @staticmethod
+    def _cell_of(sprite):
+        """Return the cell of a sprite from its pixel rect."""
+        return (sprite.rect.x // WALLSIZE, sprite.rect.y // WALLSIZE)
+
+    def get_coin_data(self):
+        cur_coin_vals = []
+        cur_coin_poss = []
+        for coin in self.coins:
+            cur_coin_vals.append(coin.value)
+            cur_coin_poss.append([coin.rect.x, coin.rect.y])
+        return cur_coin_vals, cur_coin_poss
+
+    def get_wall_data(self):
+        if self.config.compact:
+            return [[x * WALLSIZE, y * WALLSIZE] for x, y in self.wall_pos.tolist()]
+        cur_wall_poss = []
+        for wall in self.walls:
+            cur_wall_poss.append([wall.rect.x, wall.rect.y])
+        return cur_wall_poss
+
+    def gen_new_coin(self):
+        new_coin = self.coin_queue.pop()
+        if self.config.compact:
+            self.coins.spawn(*new_coin)
+            return
+        coin = Coin(*new_coin, clock=self.get_ticks)
+        if coin not in self.coins:
+            self.all_sprites.add(coin)
+            self.coins.add(coin)
+            heapq.heappush(self.expiry_heap, (coin.expires_at, self.spawned, coin))
+            self.spawned += 1
+
+    def expire_coins(self):
+        """Remove the coins whose lifespan has passed, in order of their deadline."""
+        now = self.get_ticks()
+        if self.config.compact:
+            self.coins.expire(now)
+            return
+        heap = self.expiry_heap
+        while heap and heap[0][0] < now:
+            coin = heapq.heappop(heap)[2]
+            if coin.alive():
+                coin.kill()
+
+    def life_grid(self):
+        """Return the ticks each cell's first coin to expire can still be collected in.
+
+        A coin with life L can be picked up by the end of this tick and the next
+        L - 1 ticks, so an agent moving one cell per tick reaches it in time if its
+        path distance d satisfies max(d, 1) <= L. Empty cells hold a huge value.
+        """
+        now = self.get_ticks()
+        return (self.coins.expiry_grid - now) // self.config.tick_ms + 1
+
+    def reset(self):
+        """Remove players and coins, and rewind the coin schedule and game clock."""
+        for agent in self.agents:
+            if hasattr(agent, "on_coin"):
+                self.coins.listeners.remove(agent.on_coin)
+        for sprite in self.players:
+            sprite.kill()
+        if self.config.compact:
+            self.coins.clear()
+        else:
+            for coin in self.coins.sprites():
+                coin.kill()
+        self.agents = []
+        self.agent_slots = {}
+        self.agent_cells = np.zeros((0, 2), dtype=int)
+        self.expiry_heap = []
+        self.coin_queue.rewind()
+        self.logical_time = None
+
+    def step(self, *agents):
+        """Play one frame: spawn, update sprites, score pickups and collisions.
+
+        `agents` are added to the match if needed (see `add_agents`).
+        """
+        if any(agent not in self.agent_slots for agent in agents):
+            self.add_agents(*agents)
+
+        if len(self.coins) < self.n:
+            self.gen_new_coin()
+
+        ## update the agents, tracking where they move; walls never change and coins
+        ## expire through the expiry heap, so neither is polled
+        for slot, agent in enumerate(self.agents):
+            agent.update()
+            self.agent_cells[slot] = self._cell_of(agent)
+        self.expire_coins()
+
+        # agents collect the coins on their cell, in order
+        for agent, cell in zip(self.agents, self.agent_cells.tolist()):
+            agent.score += self.coins.collect(tuple(cell))
+
+        # coins spawned on walls are removed, and each wall cell that held one is
+        # replaced by a new coin (like `groupcollide(walls, coins, False, True)`)
+        hit_cells = self.coins.discard_on(self.wall_grid)
+        for _ in hit_cells:
+            self.gen_new_coin()
+
+        # !! Note: collision between agents may result in negative utility, so your agents should cooperate well
+        # Agents are bucketed by cell, and every agent on a shared cell loses 100 per
+        # other agent there, unless the cell is on the top row or left column.
+        buckets = {}
+        for agent, (x, y) in zip(self.agents, self.agent_cells.tolist()):
+            if x != 0 and y != 0:
+                buckets.setdefault((x, y), []).append(agent)
+        for sharing in buckets.values():
+            for agent in sharing:
+                agent.score -= 100 * (len(sharing) - 1)
+
+
+# The default world, used by `main.py` and the agents unless they are given another
+world = Environment(WorldConfig(SEED))
+all_sprites = world.all_sprites
+players = world.players
+walls = world.walls
+coins = world.coins
+wall_grid = world.wall_grid  # occupancy grid of `walls`, rebuilt with the world
 running = True
 
-for i in range(WALLNUM):
-    wall = Wall(wall_pos[i][0], wall_pos[i][1])
-    if wall not in walls:
-        all_sprites.add(wall)
-        walls.add(wall)
+
+def generate_world(seed=SEED):
+    """Regenerate the default world for `seed` (see `Environment.generate`)."""
+    world.generate(seed)
+    _export_world()
+
+
+def _export_world():
+    """Point the module level world data at the default world's."""
+    global wall_pos, coin_arr, coin_queue, randAgentPath, randAgentPath1
+
+    wall_pos, coin_arr, coin_queue = world.wall_pos, world.coin_arr, world.coin_queue
+    randAgentPath, randAgentPath1 = world.rand_agent_paths
 
 
 def get_coin_data():
-    cur_coin_vals = []
-    cur_coin_poss = []
-    for coin in coins:
-        cur_coin_vals.append(coin.value)
-        cur_coin_poss.append([coin.rect.x, coin.rect.y])
-    return cur_coin_vals, cur_coin_poss
+    return world.get_coin_data()
 
 
 def get_wall_data():
-    cur_wall_poss = []
-    for wall in walls:
-        cur_wall_poss.append([wall.rect.x, wall.rect.y])
-    return cur_wall_poss
+    return world.get_wall_data()
+
+
+def gen_new_coin():
+    world.gen_new_coin()
+
+
+def reset_world():
+    """Remove players and coins, and rewind the coin schedule and game clock."""
+    world.reset()
+
+
+def step_world(*agents):
+    """Play one frame of the default world."""
+    world.step(*agents)
+
+
+_export_world()
@@ -0,0 +1,35 @@
+"""grid.py: Occupancy grid for O(1) wall lookups."""
+
+import numpy as np
+
+Location = tuple[int, int]
+
+
+class WallGrid:
+    """Boolean occupancy grid of the wall cells, indexed [x, y].
+
+    Walls never move during a game, so the grid is built once per world and
+    replaces scanning every `Wall` sprite with a single array lookup.
+    """
+
+    def __init__(self, n: int, wall_cells=()):
+        """Create an `n` x `n` grid with walls on `wall_cells`."""
+        self.n = n
+        self.blocked = np.zeros((n, n), dtype=bool)
+        self.rebuild(wall_cells)
+
+    def rebuild(self, wall_cells):
+        """Replace the walls in place, so existing references see the new world."""
+        self.blocked.fill(False)
+        for x, y in wall_cells:
+            self.blocked[x, y] = True
+
+    def is_wall(self, loc: Location) -> bool:
+        """Check if `loc` is a wall cell; off-board cells are not walls."""
+        x, y = loc
+        return 0 <= x < self.n and 0 <= y < self.n and bool(self.blocked[x, y])
+
+    def is_blocked(self, loc: Location) -> bool:
+        """Check if an agent may not stand on `loc`: a wall or off the board."""
+        x, y = loc
+        return not (0 <= x < self.n and 0 <= y < self.n) or bool(self.blocked[x, y])
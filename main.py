@@ -1,9 +1,18 @@
 from demoAgent import demoPlayer
 from randomAgent import randPlayer
 from compAgent import *
+from replay import ReplayRecorder
+from profiler import AgentProfiler
+from render import TileRenderer, open_window
+from rl import QAgent
 
+screen = open_window(WIDTH, HEIGHT)
 random.seed(1)
 
+record = None  # Set to a file name, e.g. "match.twr", to save a replay of the match
+profile = None  # Set to a file name, e.g. "profile.json", to save agent latencies
+budget_ms = None  # Set to a number of milliseconds to make slow agents forfeit a tick
+
 case = 3
 if case == 0:  # Play with this case to get an idea of the environment
     player1 = demoPlayer()
@@ -17,23 +26,26 @@ elif case == 2:  # Test if your agent is rational
 elif case == 3:  # Test if your agents cooperate with each other
     player1 = PlayerA()
     player2 = PlayerB()
+elif case == 4:  # Play a Q-table trained with `python rl.py`
+    player1 = QAgent()
+    player2 = PlayerB()
 
-all_sprites.add(player1)
-all_sprites.add(player2)
-players.add(player1)
-players.add(player2)
+# Any number of agents can play; pickups are scored in this order.
+agents = [player1, player2]
+# agents.append(randPlayer(world.rand_agent_path(2), RED))  # e.g. a third player
 
+world.add_agents(*agents)
+renderer = TileRenderer(screen, world, WHITE)  # redraws only the cells that change
 
-def gen_new_coin():
-    new_coin = coin_arr.pop(0)
-    coin = Coin(*new_coin)
-    if coin not in coins:
-        all_sprites.add(coin)
-        coins.add(coin)
+if record:
+    recorder = ReplayRecorder(agents, coins, wall_grid, TICK_MS, SEED)
+if profile or budget_ms is not None:
+    profiler = AgentProfiler(agents, budget_ms)
 
 
 # Game loop
 clock = pygame.time.Clock()
+frame = 0
 while running:
     dt = clock.tick(FPS)
     global_time += dt
@@ -43,41 +55,29 @@ while running:
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             running = False
+        elif event.type == pygame.WINDOWEXPOSED:
+            renderer.invalidate()
 
     # Game update
-    if len(coins) < N:
-        gen_new_coin()
-
-    all_sprites.update()  ## update all objects in all_sprites Group
-
-    # When player 1 hits/collects a coin:
-    hits1 = pygame.sprite.spritecollide(player1, coins, True)
-    for hit in hits1:
-        player1.score += hit.value
-    # When player 2 hits/collects a coin:
-    hits2 = pygame.sprite.spritecollide(player2, coins, True)
-    for hit in hits2:
-        player2.score += hit.value
+    step_world(*agents)
+    frame += 1
+    if record:
+        recorder.on_tick(frame)
 
-    hits = pygame.sprite.groupcollide(walls, coins, False, True)
-    for hit in hits:
-        gen_new_coin()
-
-    # !! Note: collision between agents may result in negative utility, so your agents should cooperate well
-    if player1.rect.colliderect(player2) or player2.rect.colliderect(player1):
-        if (player1.rect.x != 0 and player1.rect.y != 0) and (
-            player2.rect.x != 0 and player2.rect.y != 0
-        ):
-            player1.score -= 100
-            player2.score -= 100
-
-    # Game Render
-    screen.fill(WHITE)
-    all_sprites.draw(screen)  ## draw all objects in all_sprites Group to the screen
-    pygame.display.update()
+    # Game Render: only the cells where agents moved or coins changed are redrawn
+    renderer.draw()
 
+renderer.close()
 pygame.quit()
 
-print("Score of Player 1:", player1.score)
-print("Score of Player 2:", player2.score)
+if record:
+    recorder.save(record)
+if profile or budget_ms is not None:
+    profiler.detach()
+    print(profiler.report())
+    if profile:
+        profiler.write(profile)
+
+for slot, agent in enumerate(agents, start=1):
+    print(f"Score of Player {slot}:", agent.score)
 # print("Total Score:", player1.score + player2.score)
@@ -0,0 +1,201 @@
+"""planner.py: Plan moves by playing the game ahead on a forward model.
+
+Every update `RolloutPlanner` takes a snapshot of the world (`batch_env.GameState`)
+and forks it into a `BatchEnv` with `ROLLOUTS` boards per first move (the four
+moves and staying put). On every board the agent makes its first move and plays
+`HORIZON` more frames. The other agents walk to their closest coin. The planner
+follows the same policy but moves at random with probability `EPSILON`, so each
+board plays a different move sequence. The world is deterministic once the
+opponents' policy is fixed, so a first move is worth the best discounted score
+found behind it.
+
+Without a budget the planner plays one round of rollouts per update. With
+`budget_ms` it plays rounds until the budget is spent, and with `workers` > 1 the
+rounds run in a process pool that holds its own copy of the distance table.
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import env
+from batch_env import DOWN, LEFT, RIGHT, STAY, UP, BatchEnv, GameState
+from compAgent import Movement, PlayerA
+from distance_table import UNREACHABLE, DistanceTable
+
+# batch action of each `DistanceTable.hop` move (UP, DOWN, LEFT, RIGHT); -1 stays
+HOP_ACTIONS = np.array([UP, DOWN, LEFT, RIGHT, STAY])
+ACTION_MOVES = {
+    LEFT: Movement.LEFT,
+    RIGHT: Movement.RIGHT,
+    UP: Movement.UP,
+    DOWN: Movement.DOWN,
+}
+FIRST_MOVES = 5  # LEFT, RIGHT, UP, DOWN, STAY
+
+
+def greedy_actions(table: DistanceTable, pos: np.ndarray, coins: np.ndarray):
+    """Return the action towards each agent's closest coin by path distance.
+
+    `pos` holds (num_envs, num_agents, 2) cells and `coins` (num_envs, N, N) marks
+    the cells with coins. Agents that cannot reach a coin stay.
+    """
+    num_envs, num_agents = pos.shape[:2]
+    n = table.n
+    has_coin = coins.reshape(num_envs, -1)
+    actions = np.empty((num_envs, num_agents), dtype=int)
+    for agent in range(num_agents):
+        x, y = pos[:, agent, 0], pos[:, agent, 1]
+        dist = table.dist[x, y].reshape(num_envs, -1)
+        dist = np.where(
+            has_coin & (dist != UNREACHABLE), dist, np.iinfo(dist.dtype).max
+        )
+        target = dist.argmin(axis=1)
+        hop = table.hop[x, y, target // n, target % n]
+        hop[~has_coin[np.arange(num_envs), target]] = -1
+        actions[:, agent] = HOP_ACTIONS[hop]
+    return actions
+
+
+def rollout_returns(
+    state: GameState,
+    me: int,
+    table: DistanceTable,
+    rollouts: int,
+    horizon: int,
+    discount: float,
+    epsilon: float,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """Return the discounted score of agent `me`, shaped (FIRST_MOVES, rollouts).
+
+    Row a holds the boards on which the agent's first move is action a.
+    """
+    batch = BatchEnv.from_state(state, FIRST_MOVES * rollouts)
+    returns = np.zeros(batch.num_envs)
+    weight = 1.0
+    for frame in range(horizon + 1):
+        actions = greedy_actions(table, batch.pos, batch.coin_count > 0)
+        if frame == 0:
+            actions[:, :me] = STAY  # they have already moved this frame
+            actions[:, me] = np.repeat(np.arange(FIRST_MOVES), rollouts)
+        else:
+            explore = np.flatnonzero(rng.random(batch.num_envs) < epsilon)
+            actions[explore, me] = rng.integers(0, FIRST_MOVES, size=explore.size)
+        returns += weight * batch.step(actions)[:, me]
+        weight *= discount
+    return returns.reshape(FIRST_MOVES, rollouts)
+
+
+def play_rounds(
+    state: GameState,
+    me: int,
+    table: DistanceTable,
+    params: tuple[int, int, float, float],
+    rng: np.random.Generator,
+    budget_s: float | None,
+) -> tuple[np.ndarray, int]:
+    """Play rounds of `rollout_returns` until `budget_s` is spent (one without).
+
+    `params` holds the rollouts, horizon, discount and epsilon. Return the best
+    return found after each first move and the number of rollouts behind each.
+    """
+    start = time.perf_counter()
+    best, count = np.full(FIRST_MOVES, -np.inf), 0
+    while True:
+        returns = rollout_returns(state, me, table, *params, rng)
+        best = np.maximum(best, returns.max(axis=1))
+        count += returns.shape[1]
+        if budget_s is None or time.perf_counter() - start >= budget_s:
+            return best, count
+
+
+# Distance table of a worker process, sent once by `_init_worker`.
+_worker_table: DistanceTable | None = None
+
+
+def _init_worker(table: DistanceTable):
+    """Keep the planner's distance table in the worker process."""
+    global _worker_table  # pylint: disable=global-statement
+    _worker_table = table
+
+
+def _rollout_task(task) -> tuple[np.ndarray, int]:
+    """Play rounds of rollouts in a worker process (see `play_rounds`)."""
+    state, me, params, seed, budget_s = task
+    rng = np.random.default_rng(seed)
+    return play_rounds(state, me, _worker_table, params, rng, budget_s)
+
+
+class RolloutPlanner(PlayerA):
+    """Agent that picks its move by Monte-Carlo rollouts of the next frames.
+
+    It moves like `PlayerA` and uses its distance table for the rollout policy.
+    """
+
+    ROLLOUTS = 32  # boards per first move in each round
+    HORIZON = 12  # frames played after the first move
+    DISCOUNT = 0.9
+    EPSILON = 0.1  # chance that the planner moves at random in a rollout
+
+    def __init__(
+        self,
+        distances: DistanceTable | None = None,
+        world: env.Environment | None = None,
+        budget_ms: float | None = None,
+        workers: int = 1,
+        seed: int = 0,
+    ):
+        """Plan in `world` with `budget_ms` per update over `workers` processes."""
+        world = world if world is not None else env.world
+        super().__init__(distances or DistanceTable.cached(world.wall_grid), world)
+        self.budget_ms = budget_ms
+        self.workers = workers
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.pool: ProcessPoolExecutor | None = None
+        self.rollouts_played = 0
+
+    def _plan(self, state: GameState, me: int) -> tuple[np.ndarray, int]:
+        """Return the best return after each first move and the rollouts per move."""
+        budget_s = self.budget_ms / 1000 if self.budget_ms is not None else None
+        params = (self.ROLLOUTS, self.HORIZON, self.DISCOUNT, self.EPSILON)
+        if self.workers <= 1:
+            return play_rounds(state, me, self.distances, params, self.rng, budget_s)
+
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(
+                self.workers, initializer=_init_worker, initargs=(self.distances,)
+            )
+        seeds = self.rng.integers(2**32, size=self.workers).tolist()
+        tasks = [(state, me, params, seed, budget_s) for seed in seeds]
+        results = list(self.pool.map(_rollout_task, tasks))
+        best = np.max([best for best, _ in results], axis=0)
+        return best, sum(count for _, count in results)
+
+    def close(self):
+        """Shut down the process pool, if one was started."""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def update(self):
+        """Take the first move with the best return found by the rollouts."""
+        me = self.world.agent_slots.get(self)
+        if me is None:
+            return
+
+        # every frame spawns at most one coin plus one per wall cell holding a coin
+        spawns = (self.HORIZON + 1) * (1 + int(self.world.wall_grid.blocked.sum()))
+        state = GameState.capture(self.world, spawns)
+        returns, count = self._plan(state, me)
+        self.rollouts_played += FIRST_MOVES * count
+
+        # ties go to the move the rollout policy would make
+        greedy = greedy_actions(
+            self.distances, state.pos[None], self.world.coins.value_grid[None] > 0
+        )[0, me]
+        best = greedy if returns[greedy] == returns.max() else returns.argmax()
+        if best != STAY:
+            self.move(ACTION_MOVES[int(best)])
@@ -0,0 +1,192 @@
+"""profiler.py: Time every agent's `update()` and optionally enforce a time budget.
+
+`AgentProfiler` wraps the `update` method of each agent it is given, so the game
+loop (`all_sprites.update()` in `main.py` or `env.step_world` in the engine) is
+unchanged. For every call it records the latency, the moves issued (the change in
+`steps`), the search nodes expanded (the change in `search.total_expanded`) and, for
+agents with a `path_cache`, the searches it avoided.
+
+With a budget, an agent that overruns forfeits the tick instead of stalling the
+frame. The budget is handed to the agent's `search.GridSearch` as a deadline
+(`stop_ns`), so a search still running when it passes gives up and finds nothing;
+the agent then makes no move and caches nothing, exactly as if no coin were in
+reach. The call is never interrupted from outside, which would leave the agent's
+own state (a half-updated path cache, say) inconsistent.
+
+Limitation: work done outside a `GridSearch` (table lookups, the rollouts of
+`planner.RolloutPlanner`, which has its own `budget_ms`, or agents without a
+`search`) is not cut short. An overrun there still holds up the frame and is only
+detected afterwards, when the agent's position and step count are rolled back;
+whatever else it updated stays. For the built-in agents that is the path cache,
+whose entries are keyed by cell and so remain valid after the rollback.
+"""
+
+import csv
+import dataclasses
+import json
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class AgentProfile:
+    """Latency, move and search statistics of one agent's `update()` calls."""
+
+    slot: int
+    agent: str
+    calls: int
+    mean_ms: float
+    p50_ms: float
+    p99_ms: float
+    max_ms: float
+    moves_per_update: float
+    max_moves: int
+    nodes_expanded: int
+    searches_avoided: int
+    cache_hit_rate: float
+    forfeits: int
+
+
+class AgentProfiler:
+    """Instrument the `update()` of a list of agents.
+
+    Call `detach` (or `write`, which detaches) when the game ends to restore the
+    agents' own methods.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, players, budget_ms: float | None = None):
+        """Wrap every player's `update`; `budget_ms` is the per-call time budget."""
+        self.players = list(players)
+        self.budget_ms = budget_ms
+        self.latencies: list[list[int]] = [[] for _ in self.players]  # nanoseconds
+        self.moves: list[list[int]] = [[] for _ in self.players]
+        self.expanded = [0] * len(self.players)
+        self.cache_hits = [0] * len(self.players)
+        self.cache_lookups = [0] * len(self.players)
+        self.forfeits = [0] * len(self.players)
+
+        for slot, plr in enumerate(self.players):
+            plr.update = self._wrap(slot, plr, plr.update)
+
+    def _wrap(self, slot: int, plr, update):
+        """Return `update` instrumented for the agent in `slot`."""
+        budget_ns = int(self.budget_ms * 1e6) if self.budget_ms is not None else None
+
+        def timed_update(*args, **kwargs):
+            search = getattr(plr, "search", None)
+            expanded = search.total_expanded if search else 0
+            cache = getattr(plr, "path_cache", None)
+            hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+            timeouts = getattr(search, "timeouts", 0)
+            rect, steps = plr.rect.copy(), plr.steps
+
+            start = time.perf_counter_ns()
+            deadline = budget_ns is not None and hasattr(search, "stop_ns")
+            if deadline:
+                search.stop_ns = start + budget_ns
+            try:
+                update(*args, **kwargs)
+            finally:
+                if deadline:
+                    search.stop_ns = None
+            elapsed = time.perf_counter_ns() - start
+
+            timed_out = getattr(search, "timeouts", 0) > timeouts
+            if budget_ns is not None and (timed_out or elapsed > budget_ns):
+                plr.rect.topleft = rect.topleft
+                plr.steps = steps
+                self.forfeits[slot] += 1
+
+            self.latencies[slot].append(elapsed)
+            self.moves[slot].append(plr.steps - steps)
+            if search:
+                self.expanded[slot] += search.total_expanded - expanded
+            if cache is not None:
+                self.cache_hits[slot] += cache.hits - hits
+                self.cache_lookups[slot] += cache.hits + cache.misses - hits - misses
+
+        return timed_update
+
+    def detach(self):
+        """Restore the agents' own `update` methods."""
+        for plr in self.players:
+            plr.__dict__.pop("update", None)
+
+    def summary(self) -> list[AgentProfile]:
+        """Return the statistics of every agent, in slot order."""
+        profiles = []
+        for slot, plr in enumerate(self.players):
+            latency_ms = np.array(self.latencies[slot], dtype=float) / 1e6
+            moves = np.array(self.moves[slot], dtype=int)
+            if not latency_ms.size:
+                latency_ms, moves = np.zeros(1), np.zeros(1, dtype=int)
+            profiles.append(
+                AgentProfile(
+                    slot=slot,
+                    agent=type(plr).__name__,
+                    calls=len(self.latencies[slot]),
+                    mean_ms=float(latency_ms.mean()),
+                    p50_ms=float(np.percentile(latency_ms, 50)),
+                    p99_ms=float(np.percentile(latency_ms, 99)),
+                    max_ms=float(latency_ms.max()),
+                    moves_per_update=float(moves.mean()),
+                    max_moves=int(moves.max()),
+                    nodes_expanded=self.expanded[slot],
+                    searches_avoided=self.cache_hits[slot],
+                    cache_hit_rate=self.cache_hits[slot]
+                    / max(self.cache_lookups[slot], 1),
+                    forfeits=self.forfeits[slot],
+                )
+            )
+        return profiles
+
+    def histogram(self, slot: int) -> dict[str, int]:
+        """Count the agent's calls in power-of-two microsecond latency buckets."""
+        counts: dict[str, int] = {}
+        for elapsed in self.latencies[slot]:
+            bound = 1
+            while bound * 1000 < elapsed:
+                bound *= 2
+            key = f"<={bound}us"
+            counts[key] = counts.get(key, 0) + 1
+        return dict(sorted(counts.items(), key=lambda item: int(item[0][2:-2])))
+
+    def write(self, path: str):
+        """Detach and write the summary as CSV or JSON, chosen by the file extension.
+
+        The JSON summary also holds each agent's latency histogram.
+        """
+        self.detach()
+        profiles = self.summary()
+        with open(path, "w", newline="", encoding="utf-8") as out:
+            if path.endswith(".csv"):
+                fields = [field.name for field in dataclasses.fields(AgentProfile)]
+                writer = csv.DictWriter(out, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(dataclasses.asdict(prof) for prof in profiles)
+            else:
+                report = [
+                    {**dataclasses.asdict(prof), "histogram": self.histogram(prof.slot)}
+                    for prof in profiles
+                ]
+                json.dump(report, out, indent=2)
+                out.write("\n")
+
+    def report(self) -> str:
+        """Return a human readable table of the summary."""
+        lines = [
+            f"{'agent':<12}{'calls':>7}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+            f"{'moves':>7}{'nodes':>9}{'cached':>8}{'forfeits':>10}"
+        ]
+        for prof in self.summary():
+            lines.append(
+                f"{prof.agent:<12}{prof.calls:>7}{prof.p50_ms:>9.3f}"
+                f"{prof.p99_ms:>9.3f}{prof.max_ms:>9.3f}{prof.moves_per_update:>7.2f}"
+                f"{prof.nodes_expanded:>9}{prof.cache_hit_rate:>8.0%}"
+                f"{prof.forfeits:>10}"
+            )
+        return "\n".join(lines)
@@ -1,23 +1,31 @@
+import env
+import render
 from env import *
 
 
 class randPlayer(pygame.sprite.Sprite):
-    def __init__(self, randAgentPath, color):
+    image = render.LazyImage()
+
+    def __init__(self, randAgentPath, color, world=None):
         pygame.sprite.Sprite.__init__(self)
-        self.image = pygame.Surface((WALLSIZE, WALLSIZE))
-        self.image.fill(color)
-        pygame.draw.rect(
-            self.image, rand_color(random.randint(0, N)), self.image.get_rect(), 3
-        )
-        self.rect = self.image.get_rect()  # get image position
-        self.rect.x = random.randint(0, N - 1) * WALLSIZE
-        self.rect.y = random.randint(0, N - 1) * WALLSIZE
+        self.world = world if world is not None else env.world
+        self.color = color
+        self.border = rand_color(random.randint(0, N))
+        self.rect = pygame.Rect(0, 0, WALLSIZE, WALLSIZE)  # get image position
+        self.rect.x = random.randint(0, self.world.n - 1) * WALLSIZE
+        self.rect.y = random.randint(0, self.world.n - 1) * WALLSIZE
         self.speedx = SPEED
         self.speedy = SPEED
         self.score = 0
         self.steps = 0
         self.randAgentPath = randAgentPath
 
+    def build_image(self):
+        image = pygame.Surface((WALLSIZE, WALLSIZE))
+        image.fill(self.color)
+        pygame.draw.rect(image, self.border, image.get_rect(), 3)
+        return image
+
     def move(self, direction):
         if direction == "r":
             self.steps += 1
@@ -41,10 +49,9 @@ class randPlayer(pygame.sprite.Sprite):
                 self.rect.y -= self.speedy
 
     def is_player_collide_wall(self):
-        for wall in walls:
-            if self.rect.colliderect(wall):
-                return True
-        return False
+        return self.world.wall_grid.is_blocked(
+            (self.rect.x // self.speedx, self.rect.y // self.speedy)
+        )
 
     def update(self):
         direction = self.randAgentPath[self.steps]  # random.choice(directions)
@@ -59,11 +66,11 @@ class randPlayer(pygame.sprite.Sprite):
             self.move("d")
 
         # Avoid colliding with wall and go out of edges
-        if self.rect.right > WIDTH:
-            self.rect.right = WIDTH
+        if self.rect.right > self.world.width:
+            self.rect.right = self.world.width
         if self.rect.left < 0:
             self.rect.left = 0
-        if self.rect.bottom > HEIGHT:
-            self.rect.bottom = HEIGHT
+        if self.rect.bottom > self.world.height:
+            self.rect.bottom = self.world.height
         if self.rect.top < 0:
             self.rect.top = 0
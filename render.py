@@ -0,0 +1,152 @@
+"""render.py: On-demand display and image loading for the sprites.
+
+Headless runs never open a window, initialise the mixer or read an image: sprites
+declare their `image` as a `LazyImage`, which is only built the first time it is
+drawn. Images are loaded and scaled once per (file, size) and shared, so every coin
+of a value uses the same surface instead of scaling its own copy.
+
+`TileRenderer` draws a world frame by frame, but only redraws and pushes to the
+display the cells that changed since the previous frame.
+"""
+
+import os
+
+import pygame
+
+ASSET_DIR = "img"
+
+_images: dict[tuple, pygame.Surface] = {}
+
+
+def open_window(width: int, height: int, caption: str = "Multi-Agent Simulator"):
+    """Start pygame, open the game window and return its surface."""
+    pygame.init()
+    pygame.mixer.init()  # initialize sound
+    screen = pygame.display.set_mode((width, height))
+    pygame.display.set_caption(caption)
+    _images.clear()  # reload the images in the window's pixel format
+    return screen
+
+
+def load(
+    name: str, size: int, colorkey=None, alpha: bool = False, copy: bool = False
+) -> pygame.Surface:
+    """Return `img/<name>` scaled to `size` x `size`, loading it only once.
+
+    The surface is shared unless `copy` is set, which returns a private copy to draw
+    on. It is converted to the display's pixel format when a window is open.
+    """
+    key = (name, size, colorkey, alpha)
+    if key not in _images:
+        image = pygame.image.load(os.path.join(ASSET_DIR, name))
+        if pygame.display.get_surface() is not None:
+            image = image.convert_alpha() if alpha else image.convert()
+        image = pygame.transform.scale(image, (size, size))
+        if colorkey is not None:
+            image.set_colorkey(colorkey)
+        _images[key] = image
+    if not copy:
+        return _images[key]
+
+    # Surface.copy() drops the colorkey of per-pixel alpha surfaces
+    image = _images[key].copy()
+    if colorkey is not None:
+        image.set_colorkey(colorkey)
+    return image
+
+
+class LazyImage:
+    """Sprite attribute that calls the sprite's `build_image()` on first access.
+
+    Assigning to the attribute replaces the image, like a plain attribute.
+    """
+
+    def __get__(self, sprite, owner=None):
+        if sprite is None:
+            return self
+        image = sprite.__dict__.get("image")
+        if image is None:
+            image = sprite.__dict__["image"] = sprite.build_image()
+        return image
+
+    def __set__(self, sprite, image):
+        sprite.__dict__["image"] = image
+
+
+class TileRenderer:
+    """Draw a world by redrawing only the cells that changed since the last frame.
+
+    The walls never move, so they are baked into a background surface once. Coin
+    spawns, pickups and expiries are heard through the world's coin listeners, and
+    agent moves are found by comparing each agent's cell with the one it was drawn
+    on. `draw` restores the background under the changed cells, draws their coins
+    and agents, and updates only those rects of the display.
+    """
+
+    def __init__(self, screen: pygame.Surface, world, color=(255, 255, 255)):
+        """Draw `world` (an `env.Environment`) on `screen` over a `color` floor."""
+        self.screen = screen
+        self.world = world
+        self.tile = world.width // world.n
+        self.background = pygame.Surface(screen.get_size())
+        if pygame.display.get_surface() is not None:
+            self.background = self.background.convert()
+        self.background.fill(color)
+        world.wall_sprites().draw(self.background)
+
+        self.dirty: set[tuple[int, int]] = set()
+        self.drawn_at: dict = {}  # agent -> cell it was last drawn on
+        self.full = True
+        world.coins.listeners.append(self._on_coin)
+
+    def _on_coin(self, _change: str, coin):
+        """Mark the cell of a coin that spawned or left."""
+        self.dirty.add(coin.cell)
+
+    def _cell_of(self, sprite) -> tuple[int, int]:
+        """Return the cell a sprite stands on."""
+        return (sprite.rect.x // self.tile, sprite.rect.y // self.tile)
+
+    def invalidate(self):
+        """Redraw the whole board on the next frame, e.g. after the window was hidden."""
+        self.full = True
+
+    def draw(self) -> list[pygame.Rect]:
+        """Draw the changed cells, update them on the display and return their rects."""
+        agents = self.world.agents
+        cells = [self._cell_of(agent) for agent in agents]
+        for agent, cell in zip(agents, cells):
+            old = self.drawn_at.get(agent)
+            if old != cell:
+                self.dirty.update((old, cell) if old is not None else (cell,))
+            self.drawn_at[agent] = cell
+
+        if self.full:
+            self.screen.blit(self.background, (0, 0))
+            self.world.coins.draw(self.screen)
+            for agent in agents:
+                self.screen.blit(agent.image, agent.rect)
+            pygame.display.update()
+            self.full = False
+            self.dirty.clear()
+            return [self.screen.get_rect()]
+
+        rects = []
+        for x, y in self.dirty:
+            rect = pygame.Rect(x * self.tile, y * self.tile, self.tile, self.tile)
+            self.screen.blit(self.background, rect, rect)
+            for coin in self.world.coins.coins_at((x, y)):
+                self.screen.blit(coin.image, coin.rect)
+            rects.append(rect)
+        for agent, cell in zip(agents, cells):
+            if cell in self.dirty:
+                self.screen.blit(agent.image, agent.rect)
+        self.dirty.clear()
+        if rects:
+            pygame.display.update(rects)
+        return rects
+
+    def close(self):
+        """Stop listening to the world's coins."""
+        if self._on_coin in self.world.coins.listeners:
+            self.world.coins.listeners.remove(self._on_coin)
@@ -0,0 +1,335 @@
+"""replay.py: Record matches to a compact binary file and play them back.
+
+A replay stores every agent's position and score after each tick, the wall layout,
+and one event per coin spawn, pickup, expiry or wall removal and per collision
+penalty. A coin table lists each coin's spawn and removal tick; it is sorted by
+spawn tick and no coin outlives `max_life` ticks, so the coins on the board at any
+tick are found by a binary search. Any tick can be rebuilt from the file alone
+without re-running agent logic, and sections are read through `np.memmap`, so
+seeking in a 100k-tick replay only touches the pages it needs.
+
+File layout (little endian):
+  header   `HEADER` struct: magic, version, N, agents, tick ms, seed, ticks,
+           events, coins, max_life
+  names    16 bytes per agent
+  walls    N * N bytes, indexed [x, y]
+  frames   (ticks + 1, agents) `AGENT_DTYPE`; row 0 is the start of the match
+  index    (ticks + 2) uint32; events of tick t are events[index[t]:index[t + 1]]
+  events   `EVENT_DTYPE`, sorted by tick
+  coins    `COIN_DTYPE`, sorted by spawn tick; `end` is ticks + 1 for coins left
+"""
+
+import argparse
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"TWRP"
+VERSION = 1
+HEADER = struct.Struct("<4sHHHHiIIII")
+NAME_SIZE = 16
+
+AGENT_DTYPE = np.dtype([("x", "<i2"), ("y", "<i2"), ("score", "<i4")])
+EVENT_DTYPE = np.dtype(
+    [
+        ("tick", "<u4"),
+        ("kind", "u1"),
+        ("agent", "i1"),
+        ("coin", "<u4"),
+        ("x", "<i2"),
+        ("y", "<i2"),
+        ("value", "<i2"),
+    ]
+)
+COIN_DTYPE = np.dtype(
+    [("spawn", "<u4"), ("end", "<u4"), ("x", "<i2"), ("y", "<i2"), ("value", "<i2")]
+)
+
+# Event kinds; `agent` is -1 for events that do not involve an agent.
+SPAWN, PICKUP, EXPIRE, WALL, COLLISION = range(5)
+REMOVALS = (PICKUP, EXPIRE, WALL)
+
+AGENT_COLORS = [(0, 0, 255), (255, 255, 0), (255, 0, 0), (0, 255, 0)]
+
+
+class ReplayRecorder:
+    """Collect a match's events from the coin group and the agents' positions.
+
+    Pass `on_tick` as the engine's tick hook (or call it after every frame of the
+    render loop), then `save` the replay.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, players, coins, wall_grid, tick_ms: int, seed: int = -1):
+        """Start recording; `coins` is an `env.CoinGroup` or `env.CoinTable`."""
+        self.players = list(players)
+        self.coins = coins
+        self.walls = wall_grid.blocked.copy()
+        self.tick_ms = tick_ms
+        self.seed = seed
+        self.tick = 0
+        self.next_coin = 0
+        self.coin_ids = {}
+        self.events: list[tuple] = []
+        self.frames = [self._frame()]
+        coins.listeners.append(self._on_coin)
+
+    def _cell(self, sprite) -> tuple[int, int]:
+        """Return the cell of a sprite from its pixel rect."""
+        size = sprite.rect.width
+        return (sprite.rect.x // size, sprite.rect.y // size)
+
+    def _frame(self) -> list[tuple[int, int, int]]:
+        """Return every agent's cell and score."""
+        return [(*self._cell(plr), plr.score) for plr in self.players]
+
+    def _on_coin(self, change: str, coin):
+        """Record a coin joining or leaving the board during the current tick."""
+        tick = self.tick + 1
+        x, y = coin.cell
+        if change == "add":
+            coin_id = self.coin_ids[coin] = self.next_coin
+            self.next_coin += 1
+            self.events.append((tick, SPAWN, -1, coin_id, x, y, coin.value))
+            return
+
+        coin_id = self.coin_ids.pop(coin, None)
+        if coin_id is None:
+            return
+        kind, agent = WALL, -1
+        if coin.is_expired():
+            kind = EXPIRE
+        else:
+            for idx, plr in enumerate(self.players):
+                if self._cell(plr) == coin.cell:
+                    kind, agent = PICKUP, idx
+                    break
+        self.events.append((tick, kind, agent, coin_id, x, y, coin.value))
+
+    def on_tick(self, tick: int):
+        """Record the agents after `tick` and any collision penalties."""
+        self.tick = tick
+        frame = self._frame()
+        self.frames.append(frame)
+
+        # agents sharing a cell off the top row and left column were penalized,
+        # 100 points per other agent on the cell
+        cells: dict[tuple[int, int], list[int]] = {}
+        for idx, (x, y, _) in enumerate(frame):
+            if x != 0 and y != 0:
+                cells.setdefault((x, y), []).append(idx)
+        for (x, y), agents in cells.items():
+            penalty = -100 * (len(agents) - 1)
+            if penalty:
+                for idx in agents:
+                    self.events.append((tick, COLLISION, idx, 0, x, y, penalty))
+
+    def close(self):
+        """Stop listening to the coin group."""
+        if self._on_coin in self.coins.listeners:
+            self.coins.listeners.remove(self._on_coin)
+
+    def save(self, path: str):
+        """Write the recorded ticks to `path` and stop recording."""
+        self.close()
+        ticks = self.tick
+        events = np.array(
+            [event for event in self.events if event[0] <= ticks], dtype=EVENT_DTYPE
+        )
+        events = events[np.argsort(events["tick"], kind="stable")]
+        index = np.searchsorted(events["tick"], np.arange(ticks + 2)).astype("<u4")
+        frames = np.array(self.frames[: ticks + 1], dtype=AGENT_DTYPE)
+
+        spawns = events[events["kind"] == SPAWN]
+        coins = np.zeros(len(spawns), dtype=COIN_DTYPE)
+        for name in ("x", "y", "value"):
+            coins[name] = spawns[name]
+        coins["spawn"] = spawns["tick"]
+        coins["end"] = ticks + 1
+        removals = events[np.isin(events["kind"], REMOVALS)]
+        coins["end"][removals["coin"]] = removals["tick"]
+        max_life = int((coins["end"] - coins["spawn"]).max(initial=0))
+
+        names = b"".join(
+            type(plr).__name__.encode()[:NAME_SIZE].ljust(NAME_SIZE, b"\0")
+            for plr in self.players
+        )
+        header = HEADER.pack(
+            MAGIC,
+            VERSION,
+            self.walls.shape[0],
+            len(self.players),
+            self.tick_ms,
+            self.seed,
+            ticks,
+            len(events),
+            len(coins),
+            max_life,
+        )
+        with open(path, "wb") as out:
+            out.write(header)
+            out.write(names)
+            out.write(self.walls.astype(np.uint8).tobytes())
+            out.write(frames.tobytes())
+            out.write(index.tobytes())
+            out.write(events.tobytes())
+            out.write(coins.tobytes())
+
+
+class Replay:
+    """Memory-mapped reader that rebuilds any tick of a recorded match."""
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, path: str):
+        """Map the sections of the replay at `path`."""
+        with open(path, "rb") as src:
+            fields = HEADER.unpack(src.read(HEADER.size))
+        magic, version, self.n, self.num_agents, self.tick_ms = fields[:5]
+        self.seed, self.ticks, num_events, num_coins, self.max_life = fields[5:]
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} replay")
+
+        offset = HEADER.size
+        names = np.fromfile(
+            path, dtype=f"S{NAME_SIZE}", count=self.num_agents, offset=offset
+        )
+        self.names = [name.decode() for name in names]
+        offset += NAME_SIZE * self.num_agents
+
+        def section(dtype, shape):
+            nonlocal offset
+            array = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape)
+            offset += array.nbytes
+            return array
+
+        self.walls = np.asarray(section(np.uint8, (self.n, self.n))).astype(bool)
+        self.frames = section(AGENT_DTYPE, (self.ticks + 1, self.num_agents))
+        self.index = section("<u4", (self.ticks + 2,))
+        self.events = (
+            section(EVENT_DTYPE, (num_events,))
+            if num_events
+            else np.zeros(0, dtype=EVENT_DTYPE)
+        )
+        self.coin_table = (
+            section(COIN_DTYPE, (num_coins,))
+            if num_coins
+            else np.zeros(0, dtype=COIN_DTYPE)
+        )
+
+    def agents(self, tick: int) -> np.ndarray:
+        """Return the agents' cells and scores after `tick` (0 is the start)."""
+        return np.asarray(self.frames[tick])
+
+    def events_at(self, tick: int) -> np.ndarray:
+        """Return the events that happened during `tick`."""
+        return np.asarray(self.events[self.index[tick] : self.index[tick + 1]])
+
+    def coins(self, tick: int) -> np.ndarray:
+        """Return the coins (`COIN_DTYPE`) on the board after `tick`."""
+        spawn = self.coin_table["spawn"]
+        first = np.searchsorted(spawn, max(tick - self.max_life, 0), side="left")
+        last = np.searchsorted(spawn, tick, side="right")
+        window = np.asarray(self.coin_table[first:last])
+        return window[window["end"] > tick]
+
+    def render(self, tick: int, surface, tile: int):
+        """Draw the board after `tick` onto a pygame `surface`."""
+        # pylint: disable=import-outside-toplevel
+        import pygame
+
+        import render
+
+        black = (0, 0, 0)
+        wall = render.load("wall.png", tile, black)
+        surface.fill((255, 255, 255))
+        for x, y in np.argwhere(self.walls):
+            surface.blit(wall, (x * tile, y * tile))
+        for coin in self.coins(tick):
+            value = min(max(int(coin["value"]), 1), 9)
+            image = render.load(f"coin{value}.png", tile, black)
+            surface.blit(image, (coin["x"] * tile, coin["y"] * tile))
+        for idx, agent in enumerate(self.agents(tick)):
+            rect = (agent["x"] * tile, agent["y"] * tile, tile, tile)
+            color = AGENT_COLORS[idx % len(AGENT_COLORS)]
+            pygame.draw.rect(surface, color, rect, max(2, tile // 10))
+
+
+def play(replay: Replay, tile: int, fps: int, start: int = 0):
+    """Play a replay in a window: space pauses, arrows step, page keys skip 100."""
+    # pylint: disable=import-outside-toplevel
+    import pygame
+
+    import render
+
+    screen = render.open_window(replay.n * tile, replay.n * tile, "Replay")
+    clock = pygame.time.Clock()
+    tick, paused, running = start, False, True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                seek = {
+                    pygame.K_LEFT: -1,
+                    pygame.K_RIGHT: 1,
+                    pygame.K_PAGEDOWN: -100,
+                    pygame.K_PAGEUP: 100,
+                }
+                if event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key in seek:
+                    tick += seek[event.key]
+                elif event.key == pygame.K_HOME:
+                    tick = 0
+                elif event.key == pygame.K_END:
+                    tick = replay.ticks
+        tick = min(max(tick, 0), replay.ticks)
+
+        replay.render(tick, screen, tile)
+        scores = ", ".join(
+            f"{name} {agent['score']}"
+            for name, agent in zip(replay.names, replay.agents(tick))
+        )
+        pygame.display.set_caption(f"tick {tick}/{replay.ticks}: {scores}")
+        pygame.display.update()
+        clock.tick(fps)
+        if not paused and tick < replay.ticks:
+            tick += 1
+    pygame.quit()
+
+
+def main():
+    """Play a replay, or render the requested ticks to PNG files."""
+    parser = argparse.ArgumentParser(
+        description="play back a recorded tileworld match",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("replay")
+    parser.add_argument("--tile", type=int, default=50, help="tile size in pixels")
+    parser.add_argument("--fps", type=int, default=10)
+    parser.add_argument("--start", type=int, default=0, help="tick to start from")
+    parser.add_argument("--render", type=int, nargs="+", help="ticks to save as PNG")
+    parser.add_argument("--out", default=".", help="directory for rendered ticks")
+    args = parser.parse_args()
+
+    replay = Replay(args.replay)
+    if not args.render:
+        play(replay, args.tile, args.fps, args.start)
+        return
+
+    # pylint: disable=import-outside-toplevel
+    import pygame
+
+    surface = pygame.Surface((replay.n * args.tile, replay.n * args.tile))
+    for tick in args.render:
+        replay.render(tick, surface, args.tile)
+        path = os.path.join(args.out, f"tick_{tick:06d}.png")
+        pygame.image.save(surface, path)
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
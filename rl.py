@@ -0,0 +1,335 @@
+"""rl.py: Train a tabular Q-learning agent on batches of headless boards.
+
+Training plays `BatchEnv` boards in lock-step with no rendering. On every board
+the table's agent plays against an agent that walks to its closest coin, and
+both agents' moves, each seen from its own point of view, are learned from, so
+every frame gives two transitions per board. A state is encoded by `encode` from:
+  - the first move towards the closest coin by path distance, how far it is
+    (up to `MAX_DIST` moves) and whether the closest other agent is nearer to it;
+  - the offset to the closest other agent if it is within `RIVAL_RANGE` moves
+    along both axes.
+
+Path distances and first moves come from a `DistanceTable` per board, so the
+walls enter the state through them. `QAgent` plays a saved
+table greedily in the sprite engine, next to `PlayerA` and `PlayerB` (see the
+`QAgent` entry in `engine.AGENTS` and case 4 in `main.py`).
+"""
+
+import argparse
+import os
+import random
+import time
+import warnings
+from dataclasses import dataclass, field
+from typing import Iterator
+
+import numpy as np
+
+import env
+from batch_env import STAY, BatchEnv
+from compAgent import PlayerA
+from distance_table import CACHE_DIR, UNREACHABLE, DistanceTable
+from grid import WallGrid
+from planner import ACTION_MOVES, HOP_ACTIONS
+
+MAX_DIST = 10  # coins further away share the distance of MAX_DIST moves
+RIVAL_RANGE = 2  # rivals further than this along either axis are not placed
+RIVAL_SIDE = 2 * RIVAL_RANGE + 1
+COIN_STATES = 5 * (MAX_DIST + 1) * 2  # first move, distance, contested
+RIVAL_STATES = RIVAL_SIDE**2 + 1  # the last one means no rival nearby
+NUM_STATES = COIN_STATES * RIVAL_STATES
+NUM_ACTIONS = 5  # LEFT, RIGHT, UP, DOWN, STAY
+
+DEFAULT_TABLE = os.path.join(CACHE_DIR, "qtable.npz")
+
+
+def board_tables(walls: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return the `DistanceTable` arrays of every board, stacked on a first axis."""
+    tables = [DistanceTable.build(WallGrid(len(w), np.argwhere(w))) for w in walls]
+    return np.stack([t.dist for t in tables]), np.stack([t.hop for t in tables])
+
+
+def encode(
+    tables: tuple[np.ndarray, np.ndarray],
+    pos: np.ndarray,
+    coins: np.ndarray,
+    me: int,
+) -> np.ndarray:
+    """Return the state index of agent `me` on every board.
+
+    `tables` holds the (num_envs, N, N, N, N) distance and hop arrays of the
+    boards, `pos` (num_envs, num_agents, 2) cells and `coins` (num_envs, N, N)
+    masks.
+    """
+    dist, hop = tables
+    num_envs, num_agents = pos.shape[:2]
+    n = coins.shape[-1]
+    envs = np.arange(num_envs)
+    x, y = pos[:, me, 0], pos[:, me, 1]
+
+    # closest other agent
+    rival = np.full(num_envs, RIVAL_SIDE**2)
+    if num_agents > 1:
+        others = np.delete(pos, me, axis=1)
+        offsets = others - pos[:, me, None, :]
+        closest = np.abs(offsets).sum(axis=2).argmin(axis=1)
+        offset = offsets[envs, closest] + RIVAL_RANGE
+        nearby = ((offset >= 0) & (offset < RIVAL_SIDE)).all(axis=1)
+        rival = np.where(nearby, offset[:, 0] * RIVAL_SIDE + offset[:, 1], rival)
+
+    # closest coin by path distance
+    mine = dist[envs, x, y].reshape(num_envs, -1)
+    has_coin = coins.reshape(num_envs, -1) & (mine != UNREACHABLE)
+    target = np.where(has_coin, mine, np.iinfo(mine.dtype).max).argmin(axis=1)
+    tx, ty = target // n, target % n
+    found = has_coin[envs, target]
+    move = np.where(found, HOP_ACTIONS[hop[envs, x, y, tx, ty]], STAY)
+    near = np.minimum(mine[envs, target], MAX_DIST)
+    contested = np.zeros(num_envs, dtype=bool)
+    if num_agents > 1:
+        rx, ry = others[envs, closest, 0], others[envs, closest, 1]
+        theirs = dist[envs, rx, ry, tx, ty]
+        contested = found & (theirs != UNREACHABLE) & (theirs < mine[envs, target])
+    coin = (move * (MAX_DIST + 1) + np.where(found, near, 0)) * 2 + contested
+
+    return coin * RIVAL_STATES + rival
+
+
+def first_move(states: np.ndarray) -> np.ndarray:
+    """Return the first move towards the closest coin encoded in `states`."""
+    return states // RIVAL_STATES // 2 // (MAX_DIST + 1)
+
+
+@dataclass
+class QTable:
+    """Action values of every encoded state, shaped (NUM_STATES, NUM_ACTIONS)."""
+
+    q: np.ndarray = field(
+        default_factory=lambda: np.zeros((NUM_STATES, NUM_ACTIONS), dtype=np.float32)
+    )
+    visits: np.ndarray = field(
+        default_factory=lambda: np.zeros((NUM_STATES, NUM_ACTIONS), dtype=np.int64)
+    )
+    steps: int = 0  # transitions learned from
+
+    def greedy(self, states: np.ndarray) -> np.ndarray:
+        """Return the best action in every state."""
+        return self.q[states].argmax(axis=1)
+
+    def save(self, path: str):
+        """Write the table to an .npz file."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez_compressed(path, q=self.q, visits=self.visits, steps=self.steps)
+
+    @classmethod
+    def load(cls, path: str) -> "QTable":
+        """Read a table written by `save`."""
+        with np.load(path) as data:
+            q, visits, steps = data["q"], data["visits"], int(data["steps"])
+        if q.shape != (NUM_STATES, NUM_ACTIONS):
+            raise ValueError(
+                f"{path} holds a {q.shape} table, the encoding needs "
+                f"{(NUM_STATES, NUM_ACTIONS)}; train it again"
+            )
+        return cls(q, visits, steps)
+
+
+@dataclass(frozen=True)
+class Episode:
+    """Statistics of one episode played on every board of a batch."""
+
+    epsilon: float
+    mean_return: float  # score of the table's agent per board
+    steps_per_s: float  # agent transitions learned from per second
+
+
+def train(
+    table: QTable,
+    episodes: int,
+    boards: int = 512,
+    refresh: int = 16,
+    lr: float = 0.01,
+    gamma: float = 0.9,
+    epsilon: tuple[float, float] = (1.0, 0.05),
+    seed: int = 0,
+    ticks: int = env.SEC * env.FPS + 1,
+) -> Iterator[Episode]:
+    """Run Q-learning on `table` and yield the statistics after every episode.
+
+    An episode plays `ticks` frames on `boards` boards at once. Generating boards
+    costs more than playing them, so a fresh set of seeds is drawn every `refresh`
+    episodes and the boards are replayed from the start in between.
+
+    The first agent on a board plays the table and the others walk to their
+    closest coin, like `PlayerA`. All of them explore with a chance that decays
+    linearly from `epsilon[0]` to `epsilon[1]`, and the table learns from every
+    agent's moves, as Q-learning does not depend on the policy that made them.
+    A state-action pair moves by the mean error of its visits so far, or by `lr`
+    once it has been visited more than 1 / `lr` times.
+    """
+    rng = np.random.default_rng(seed)
+    flat, visits = table.q.reshape(-1), table.visits.reshape(-1)
+    batch = None
+    for episode in range(episodes):
+        if episode % refresh == 0:
+            batch = BatchEnv(rng.integers(2**31, size=boards))
+            tables = board_tables(batch.walls)
+        else:
+            batch.reset()
+        start = time.perf_counter()
+        eps = epsilon[0] + (epsilon[1] - epsilon[0]) * episode / max(1, episodes - 1)
+        agents = range(batch.num_agents)
+        states = [encode(tables, batch.pos, batch.coin_count > 0, me) for me in agents]
+        for tick in range(ticks):
+            actions = np.stack([first_move(state) for state in states], axis=1)
+            actions[:, 0] = table.greedy(states[0])
+            explore = rng.random(actions.shape) < eps
+            actions[explore] = rng.integers(0, NUM_ACTIONS, size=explore.sum())
+            rewards = batch.step(actions).astype(np.float32)
+            coins = batch.coin_count > 0
+            cells, targets = [], []
+            for me in agents:
+                cells.append(states[me] * NUM_ACTIONS + actions[:, me])
+                states[me] = encode(tables, batch.pos, coins, me)
+                target = rewards[:, me]
+                if tick < ticks - 1:
+                    target = target + gamma * table.q[states[me]].max(axis=1)
+                targets.append(target)
+            # boards that share a state and action move it by their mean error
+            cells, inverse, counts = np.unique(
+                np.concatenate(cells), return_inverse=True, return_counts=True
+            )
+            error = np.bincount(
+                inverse, weights=np.concatenate(targets) - flat[cells[inverse]]
+            )
+            visits[cells] += counts
+            flat[cells] += np.maximum(1 / visits[cells], lr / counts) * error
+        transitions = ticks * batch.num_envs * batch.num_agents
+        table.steps += transitions
+        yield Episode(
+            eps,
+            float(batch.scores[:, 0].mean()),
+            transitions / (time.perf_counter() - start),
+        )
+
+
+class QAgent(PlayerA):
+    """Agent that plays the greedy action of a trained `QTable`.
+
+    It moves like `PlayerA`; the table comes from `python rl.py`. Without a saved
+    table it plays an untrained (all-zero) one and warns about it.
+    """
+
+    def __init__(
+        self,
+        table: QTable | str = DEFAULT_TABLE,
+        world: env.Environment | None = None,
+    ):
+        """Play `table`, or the table saved at that path, in `world`."""
+        world = world if world is not None else env.world
+        super().__init__(DistanceTable.cached(world.wall_grid), world)
+        if isinstance(table, str):
+            if os.path.exists(table):
+                table = QTable.load(table)
+            else:
+                warnings.warn(
+                    f"no Q-table at {table}, playing an untrained one; "
+                    "train it with `python rl.py`",
+                    stacklevel=2,
+                )
+                table = QTable()
+        self.table = table
+
+    def update(self):
+        """Move by the table's best action for the current state."""
+        me = self.world.agent_slots.get(self)
+        if me is None:
+            return
+        state = encode(
+            (self.distances.dist[None], self.distances.hop[None]),
+            self.world.agent_cells[None],
+            self.world.coins.value_grid[None] > 0,
+            me,
+        )
+        action = int(self.table.greedy(state)[0])
+        if action != STAY:
+            self.move(ACTION_MOVES[action])
+
+
+def evaluate(table: QTable, opponent: str, seeds, ticks: int) -> list[tuple[int, int]]:
+    """Play a `QAgent` against `opponent` on every seed; return the score pairs."""
+    # pylint: disable=import-outside-toplevel
+    import engine
+    from tournament import world_for
+
+    scores = []
+    for seed in seeds:
+        world = world_for(seed, env.N)
+        random.seed(seed)
+        agent = QAgent(table, world)
+        other = engine.AGENTS[opponent](1, world)
+        scores.append(engine.run_match(agent, other, ticks, world=world))
+    return scores
+
+
+def main():
+    """Train a Q-table from the command line, save it and play a few matches."""
+    # pylint: disable=import-outside-toplevel
+    import engine
+
+    parser = argparse.ArgumentParser(
+        description="train a tabular Q-learning tileworld agent",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("-e", "--episodes", type=int, default=200)
+    parser.add_argument("-b", "--boards", type=int, default=512)
+    parser.add_argument(
+        "--refresh", type=int, default=16, help="episodes per set of boards"
+    )
+    parser.add_argument("--lr", type=float, default=0.01, help="learning rate floor")
+    parser.add_argument("--gamma", type=float, default=0.9)
+    parser.add_argument("--epsilon", type=float, nargs=2, default=(1.0, 0.05))
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-t", "--ticks", type=int, default=engine.MAX_TICKS)
+    parser.add_argument("-o", "--output", default=DEFAULT_TABLE)
+    parser.add_argument("--resume", action="store_true", help="keep training -o")
+    parser.add_argument("--opponent", type=engine.agent_name, default="PlayerA")
+    parser.add_argument("--eval", type=int, default=16, help="matches after training")
+    args = parser.parse_args()
+
+    table = QTable.load(args.output) if args.resume else QTable()
+    start = time.perf_counter()
+    for episode, stats in enumerate(
+        train(
+            table,
+            args.episodes,
+            args.boards,
+            args.refresh,
+            args.lr,
+            args.gamma,
+            tuple(args.epsilon),
+            args.seed,
+            args.ticks,
+        ),
+        start=1,
+    ):
+        if episode % 10 == 0 or episode == args.episodes:
+            print(
+                f"episode {episode}: epsilon {stats.epsilon:.2f}, "
+                f"return {stats.mean_return:.1f}, {stats.steps_per_s:,.0f} steps/s"
+            )
+    elapsed = time.perf_counter() - start
+    table.save(args.output)
+    print(f"{table.steps:,} steps in {elapsed:.1f}s, saved {args.output}")
+
+    if args.eval:
+        scores = evaluate(table, args.opponent, range(args.eval), args.ticks)
+        wins = sum(mine > theirs for mine, theirs in scores)
+        print(
+            f"QAgent vs {args.opponent}: {wins} of {len(scores)} won, mean "
+            f"{np.mean([s[0] for s in scores]):.1f} to {np.mean([s[1] for s in scores]):.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
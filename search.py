@@ -0,0 +1,422 @@
+"""search.py: Reusable breadth-first, A* and Dijkstra searches over a wall grid.
+
+A `GridSearch` is built once per world. It keeps preallocated closed-set, parent and
+cost arrays for a grid padded with a wall border, so a search never allocates
+per-cell bookkeeping and never bounds-checks a neighbour. Instead of clearing the
+arrays between searches, each search uses a new generation number and a cell
+counts as visited only when it is stamped with the current generation.
+
+Setting `stop_ns` (a `time.perf_counter_ns()` value) gives searches a deadline: a
+search still running past it gives up and finds nothing. `profiler.AgentProfiler`
+uses this to enforce its per-update budget.
+"""
+
+import heapq
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Hashable, Iterable
+
+import numpy as np
+
+from distance_table import UNREACHABLE
+from grid import Location, WallGrid
+
+
+@dataclass
+class SearchResult:
+    """Outcome of a search: the goal found, the path to it and the work done.
+
+    `path` lists the cells after the start, ending on `goal`; `goal` is None when
+    no goal was reachable (within the depth limit).
+    """
+
+    goal: Location | None
+    path: list[Location] = field(default_factory=list)
+    cost: float = 0
+    expanded: int = 0
+
+
+class GridSearch:
+    """Searches over a `WallGrid` that reuse preallocated arrays."""
+
+    # pylint: disable=too-many-instance-attributes
+
+    # goal arrays longer than this are indexed with NumPy, shorter ones in Python
+    VECTORIZE_GOALS = 64
+    # A* and Dijkstra check the deadline every this many expansions
+    CLOCK_EVERY = 64
+
+    def __init__(self, grid: WallGrid):
+        """Preallocate the search arrays for `grid`."""
+        self.n = grid.n
+        self.width = width = grid.n + 2
+        padded = np.pad(grid.blocked, 1, constant_values=True)
+        self.blocked = padded.ravel().tolist()
+
+        # neighbour offsets in the order of `compAgent.Movement`: UP, DOWN, LEFT, RIGHT
+        self.offsets = (-1, 1, -width, width)
+
+        size = width * width
+        self.seen = [0] * size
+        self.closed = [0] * size
+        self.parent = [0] * size
+        self.cost = [0.0] * size
+        self.generation = 0
+
+        self.expanded = 0  # cells expanded by the last search
+        self.total_expanded = 0  # cells expanded by all searches
+        self.stop_ns: int | None = None  # perf_counter_ns deadline of searches
+        self.timeouts = 0  # searches given up at the deadline
+
+    def _index(self, loc: Location) -> int:
+        """Return the padded flat index of `loc`."""
+        return (loc[0] + 1) * self.width + loc[1] + 1
+
+    def _location(self, idx: int) -> Location:
+        """Return the location of a padded flat index."""
+        x, y = divmod(idx, self.width)
+        return (x - 1, y - 1)
+
+    def _goal_indices(self, goals: Iterable[Location] | np.ndarray) -> set[int]:
+        """Return the flat indices of the on-board `goals`.
+
+        Goals may also be given as an integer array of (x, y) rows; more than
+        `VECTORIZE_GOALS` rows are converted in one vectorized pass.
+        """
+        if isinstance(goals, np.ndarray):
+            goals = goals.reshape(-1, 2)
+            if len(goals) <= self.VECTORIZE_GOALS:
+                goals = goals.tolist()
+            else:
+                goals = goals[((goals >= 0) & (goals < self.n)).all(axis=1)]
+                return set(((goals[:, 0] + 1) * self.width + goals[:, 1] + 1).tolist())
+        return {
+            self._index(goal)
+            for goal in goals
+            if 0 <= goal[0] < self.n and 0 <= goal[1] < self.n
+        }
+
+    def _start(self, start: Location) -> int:
+        """Begin a new search generation at `start` and return its index."""
+        self.generation += 1
+        idx = self._index(start)
+        self.seen[idx] = self.generation
+        self.parent[idx] = idx
+        self.cost[idx] = 0
+        return idx
+
+    def _out_of_time(self) -> bool:
+        """Check if the deadline has passed; if so, count a timeout."""
+        if self.stop_ns is None or time.perf_counter_ns() <= self.stop_ns:
+            return False
+        self.timeouts += 1
+        self.generation += 1  # forget the partial search, so `path_to` finds nothing
+        return True
+
+    def _finish(self, goal: int | None, cost: float, expanded: int) -> SearchResult:
+        """Record the work done and trace the path back to the start."""
+        self.expanded = expanded
+        self.total_expanded += expanded
+        if goal is None:
+            return SearchResult(None, [], -1, expanded)
+
+        return SearchResult(self._location(goal), self._trace(goal), cost, expanded)
+
+    def _trace(self, idx: int) -> list[Location]:
+        """Return the cells after the start on the last search's path to `idx`."""
+        path = []
+        while self.parent[idx] != idx:
+            path.append(self._location(idx))
+            idx = self.parent[idx]
+        path.reverse()
+        return path
+
+    def bfs(
+        self,
+        start: Location,
+        goals: Iterable[Location] | np.ndarray,
+        max_depth: int | None = None,
+    ) -> SearchResult:
+        """Find the closest of `goals`, ignoring goals more than `max_depth` away.
+
+        Among equally close goals the first one reached wins: cells are expanded in
+        the order they were found and neighbours in `offsets` order. (The original
+        `find_path` broke such ties by the cells' coordinates instead.)
+        """
+        targets = self._goal_indices(goals)
+        src = self._start(start)
+        if src in targets:
+            return self._finish(src, 0, 0)
+
+        gen, seen = self.generation, self.seen
+        parent, blocked = self.parent, self.blocked
+        frontier = [src]
+        depth = expanded = 0
+        while frontier and (max_depth is None or depth < max_depth):
+            if self._out_of_time():
+                return self._finish(None, -1, expanded)
+            depth += 1
+            next_frontier = []
+            for cur in frontier:
+                expanded += 1
+                for offset in self.offsets:
+                    nbr = cur + offset
+                    if blocked[nbr] or seen[nbr] == gen:
+                        continue
+                    seen[nbr] = gen
+                    parent[nbr] = cur
+                    if nbr in targets:
+                        return self._finish(nbr, depth, expanded)
+                    next_frontier.append(nbr)
+            frontier = next_frontier
+        return self._finish(None, -1, expanded)
+
+    def distance_field(
+        self,
+        start: Location,
+        goals: Iterable[Location] | np.ndarray | None = None,
+        max_depth: int | None = None,
+    ) -> np.ndarray:
+        """Return the moves from `start` to every cell as an [x, y] array.
+
+        Walls, unreachable cells and cells beyond `max_depth` are `UNREACHABLE`, and
+        so is every cell if the search runs out of time.
+        With `goals`, the search stops after the layer holding the closest goals, so
+        every goal that ties for closest is labelled. Read the path to a labelled
+        cell with `path_to`.
+        """
+        targets = self._goal_indices(goals) if goals is not None else set()
+        src = self._start(start)
+
+        gen, seen = self.generation, self.seen
+        parent, blocked = self.parent, self.blocked
+        order = [src]  # cells in the order they were reached
+        depths = [0]  # and their distances from `start`
+        bounds = [0, 1]  # layer d is order[bounds[d] : bounds[d + 1]]
+        found = src in targets
+        while (
+            bounds[-2] < bounds[-1]
+            and not found
+            and (max_depth is None or len(bounds) - 2 < max_depth)
+        ):
+            if self._out_of_time():
+                order, depths = [], []
+                break
+            for cur in order[bounds[-2] : bounds[-1]]:
+                for offset in self.offsets:
+                    nbr = cur + offset
+                    if blocked[nbr] or seen[nbr] == gen:
+                        continue
+                    seen[nbr] = gen
+                    parent[nbr] = cur
+                    order.append(nbr)
+            found = not targets.isdisjoint(order[bounds[-1] :])
+            depths.extend([len(bounds) - 1] * (len(order) - bounds[-1]))
+            bounds.append(len(order))
+        self.expanded = bounds[-2]
+        self.total_expanded += bounds[-2]
+
+        field = np.full(self.width * self.width, UNREACHABLE, dtype=int)
+        field[order] = depths
+        field = field.reshape(self.width, self.width)[1:-1, 1:-1]
+        return field
+
+    def path_to(self, goal: Location) -> list[Location]:
+        """Return the cells after the start on the last search's path to `goal`.
+
+        The path is empty if the last search did not reach `goal`.
+        """
+        idx = self._index(goal)
+        if self.seen[idx] != self.generation:
+            return []
+        return self._trace(idx)
+
+    def astar(
+        self, start: Location, goal: Location, max_depth: int | None = None
+    ) -> SearchResult:
+        """Find a shortest path to `goal` guided by the Manhattan distance.
+
+        Every move costs one and the Manhattan distance never overestimates the
+        remaining moves, so the first time `goal` is expanded its path is optimal.
+        Ties on the estimate go to the deeper cell, which keeps open areas cheap.
+        """
+        if not self._goal_indices([goal]):
+            return self._finish(None, -1, 0)
+        src = self._start(start)
+        dst = self._index(goal)
+        goal_x, goal_y = goal
+        width = self.width
+
+        gen, seen, closed = self.generation, self.seen, self.closed
+        parent, cost, blocked = self.parent, self.cost, self.blocked
+        frontier = [(abs(start[0] - goal_x) + abs(start[1] - goal_y), 0, src)]
+        expanded = 0
+        while frontier:
+            _, neg_cost, cur = heapq.heappop(frontier)
+            g_cost = -neg_cost
+            if closed[cur] == gen:
+                continue
+            if cur == dst:
+                return self._finish(cur, g_cost, expanded)
+            closed[cur] = gen
+            expanded += 1
+            if not expanded % self.CLOCK_EVERY and self._out_of_time():
+                return self._finish(None, -1, expanded)
+            if max_depth is not None and g_cost >= max_depth:
+                continue
+
+            for offset in self.offsets:
+                nbr = cur + offset
+                if blocked[nbr] or closed[nbr] == gen:
+                    continue
+                nbr_cost = g_cost + 1
+                if seen[nbr] == gen and cost[nbr] <= nbr_cost:
+                    continue
+                seen[nbr] = gen
+                cost[nbr] = nbr_cost
+                parent[nbr] = cur
+                x, y = divmod(nbr, width)
+                h_cost = abs(x - 1 - goal_x) + abs(y - 1 - goal_y)
+                heapq.heappush(frontier, (nbr_cost + h_cost, -nbr_cost, nbr))
+        return self._finish(None, -1, expanded)
+
+    def dijkstra(
+        self,
+        start: Location,
+        goals: Iterable[Location] | np.ndarray,
+        costs: np.ndarray | None = None,
+    ) -> SearchResult:
+        """Find the cheapest of `goals`, paying `costs[x, y]` to enter a cell.
+
+        Without `costs` every move costs one, which finds the same goal distance
+        as `bfs`.
+        """
+        targets = self._goal_indices(goals)
+        src = self._start(start)
+        width = self.width
+
+        gen, seen, closed = self.generation, self.seen, self.closed
+        parent, cost, blocked = self.parent, self.cost, self.blocked
+        frontier = [(0.0, src)]
+        expanded = 0
+        while frontier:
+            g_cost, cur = heapq.heappop(frontier)
+            if closed[cur] == gen:
+                continue
+            if cur in targets:
+                return self._finish(cur, g_cost, expanded)
+            closed[cur] = gen
+            expanded += 1
+            if not expanded % self.CLOCK_EVERY and self._out_of_time():
+                return self._finish(None, -1, expanded)
+
+            for offset in self.offsets:
+                nbr = cur + offset
+                if blocked[nbr] or closed[nbr] == gen:
+                    continue
+                if costs is None:
+                    nbr_cost = g_cost + 1
+                else:
+                    x, y = divmod(nbr, width)
+                    nbr_cost = g_cost + costs.item(x - 1, y - 1)
+                if seen[nbr] == gen and cost[nbr] <= nbr_cost:
+                    continue
+                seen[nbr] = gen
+                cost[nbr] = nbr_cost
+                parent[nbr] = cur
+                heapq.heappush(frontier, (nbr_cost, nbr))
+        return self._finish(None, -1, expanded)
+
+
+class PathCache:
+    """LRU cache of found paths, so an agent following one does not search again.
+
+    A path is stored under every cell along it, keyed by (cell, context) where
+    `context` is whatever else the search depended on (e.g. the excluded partitions);
+    a change of context simply misses. Reading an entry is O(1) besides copying the
+    remaining path. `drop_goal` forgets paths to a goal that went away and
+    `drop_closer` forgets paths that a new goal may beat.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, capacity: int = 256):
+        """Keep at most `capacity` cells' entries; 0 disables the cache."""
+        self.capacity = capacity
+        # (cell, context) -> (goal, path, index of the cell's next step in path)
+        self._entries: OrderedDict[tuple, tuple[Location, tuple, int]] = OrderedDict()
+        self._by_goal: dict[Location, set[tuple]] = {}
+
+        self.hits = 0  # searches avoided
+        self.misses = 0
+        self.invalidated = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, start: Location, context: Hashable = None) -> SearchResult | None:
+        """Return the rest of a cached path from `start`, or None on a miss."""
+        key = (start, context)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        goal, path, idx = entry
+        return SearchResult(goal, list(path[idx:]), len(path) - idx)
+
+    def put(self, start: Location, context: Hashable, result: SearchResult):
+        """Store the path of `result` under `start` and every cell along it."""
+        if self.capacity <= 0 or result.goal is None or not result.path:
+            return
+        path = tuple(result.path)
+        for idx, cell in enumerate((start, *path[:-1])):
+            key = (cell, context)
+            self._remove(key)
+            self._entries[key] = (result.goal, path, idx)
+            self._by_goal.setdefault(result.goal, set()).add(key)
+        while len(self._entries) > self.capacity:
+            self._remove(next(iter(self._entries)))
+            self.evicted += 1
+
+    def drop_goal(self, goal: Location):
+        """Forget every path that ends on `goal`."""
+        for key in self._by_goal.pop(goal, ()):
+            if self._entries.pop(key, None) is not None:
+                self.invalidated += 1
+
+    def drop_closer(self, cell: Location):
+        """Forget the paths that a goal at `cell` could be closer than."""
+        stale = [
+            key
+            for key, (_, path, idx) in self._entries.items()
+            if abs(key[0][0] - cell[0]) + abs(key[0][1] - cell[1]) < len(path) - idx
+        ]
+        for key in stale:
+            self._remove(key)
+        self.invalidated += len(stale)
+
+    def clear(self):
+        """Forget every path, keeping the counters."""
+        self._entries.clear()
+        self._by_goal.clear()
+
+    def _remove(self, key: tuple):
+        """Delete the entry under `key`, if any."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._by_goal.get(entry[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_goal[entry[0]]
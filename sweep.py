@@ -0,0 +1,303 @@
+"""sweep.py: Tune PlayerB's partitioning and search knobs with headless matches.
+
+A configuration sets the `search_depth`, `partitions` and `partition_overlap` of
+`PlayerB`. It is scored by its mean margin over an opponent (its score minus the
+opponent's) on a set of seeds, each played in both slot orders. Matches run in a
+process pool, and every finished (configuration, seed) margin is appended to a
+JSON lines cache together with a hash of the agent code, so a repeated sweep only
+plays what it has not played before.
+
+Strategies:
+  - grid: every combination of the given values;
+  - random: `--samples` of those combinations, drawn at random;
+  - halving: successive halving. Every combination plays `--min-seeds` seeds,
+    the best 1 / `--eta` of them play `--eta` times as many, and so on until one
+    is left or the seeds run out.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+import engine
+import env
+from compAgent import PlayerB
+from distance_table import CACHE_DIR
+from tournament import parse_seeds, world_for
+
+Config = tuple[tuple[str, int], ...]  # (knob, value) pairs in KNOBS order
+
+KNOBS = ("search_depth", "partitions", "partition_overlap")
+
+# partition labels are 64 bit masks (see `compAgent.partition_labels`)
+MAX_PARTITIONS = 64
+
+
+def code_files() -> list[str]:
+    """Return the repository modules loaded besides this one, sorted by name.
+
+    These are the sources that decide how a match plays out.
+    """
+    base = os.path.dirname(os.path.abspath(__file__))
+    files = set()
+    for module in list(sys.modules.values()):
+        path = getattr(module, "__file__", None)
+        if path and os.path.dirname(os.path.abspath(path)) == base:
+            files.add(os.path.basename(path))
+    files.discard(os.path.basename(__file__))
+    return sorted(files)
+
+
+def code_version() -> str:
+    """Return a short hash of `code_files()`; cached margins are keyed by it."""
+    digest = hashlib.sha1()
+    base = os.path.dirname(os.path.abspath(__file__))
+    for name in code_files():
+        digest.update(name.encode())
+        with open(os.path.join(base, name), "rb") as src:
+            digest.update(src.read())
+    return digest.hexdigest()[:12]
+
+
+def partition_count(text: str) -> int:
+    """Parse a number of partitions per side, for argparse."""
+    k = int(text)
+    if k < 1:
+        raise argparse.ArgumentTypeError(f"need at least one partition, got {k}")
+    if k * k > MAX_PARTITIONS:
+        raise argparse.ArgumentTypeError(
+            f"{k} x {k} partitions do not fit in {MAX_PARTITIONS} labels"
+        )
+    return k
+
+
+def play_config(task: tuple[Config, str, int, int, int]) -> tuple[Config, int, float]:
+    """Play a configuration against `opponent` on one seed in both slot orders.
+
+    Return the configuration, the seed and its mean margin over the two matches.
+    """
+    config, opponent, seed, ticks, n = task
+    margin = 0
+    for slot in (0, 1):
+        world = world_for(seed, n)
+        random.seed(seed)
+        players = []
+        for idx in range(2):
+            if idx == slot:
+                players.append(PlayerB(world=world, **dict(config)))
+            else:
+                players.append(engine.AGENTS[opponent](idx, world))
+        scores = engine.run_match(*players, ticks, world=world)
+        margin += scores[slot] - scores[1 - slot]
+    return config, seed, margin / 2
+
+
+class ResultCache:
+    """Margins of (configuration, seed) pairs stored as JSON lines.
+
+    Only lines played against the same opponent, with the same ticks, board size
+    and agent code are used.
+    """
+
+    def __init__(self, path: str | None, context: dict):
+        """Load the lines of `path` (None keeps results in memory) for `context`."""
+        self.path = path
+        self.context = context
+        self.margins: dict[tuple[Config, int], float] = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as src:
+                for line in src:
+                    entry = json.loads(line)
+                    if all(entry.get(key) == value for key, value in context.items()):
+                        config = tuple((knob, entry["config"][knob]) for knob in KNOBS)
+                        self.margins[config, entry["seed"]] = entry["margin"]
+
+    def __contains__(self, key: tuple[Config, int]) -> bool:
+        """Check if the (configuration, seed) pair has been played."""
+        return key in self.margins
+
+    def get(self, config: Config, seed: int) -> float:
+        """Return the margin of a played pair."""
+        return self.margins[config, seed]
+
+    def put(self, config: Config, seed: int, margin: float):
+        """Record a margin, appending it to the cache file."""
+        self.margins[config, seed] = margin
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            entry = {**self.context, "config": dict(config), "seed": seed}
+            with open(self.path, "a", encoding="utf-8") as out:
+                out.write(json.dumps({**entry, "margin": margin}) + "\n")
+
+
+def evaluate(
+    configs: list[Config],
+    seeds: list[int],
+    cache: ResultCache,
+    pool: Executor | None,
+    workers: int = 1,
+) -> dict[Config, list[float]]:
+    """Return the margins of every configuration on `seeds`, playing what is new.
+
+    `workers` is the number of processes in `pool`.
+    """
+    context = cache.context
+    tasks = [
+        (config, context["opponent"], seed, context["ticks"], context["n"])
+        for config in configs
+        for seed in seeds
+        if (config, seed) not in cache
+    ]
+    if tasks:
+        if pool is None:
+            results = map(play_config, tasks)
+        else:
+            chunksize = max(1, len(tasks) // (workers * 4))
+            results = pool.map(play_config, tasks, chunksize=chunksize)
+        for config, seed, margin in results:
+            cache.put(config, seed, margin)
+    return {config: [cache.get(config, seed) for seed in seeds] for config in configs}
+
+
+def grid_configs(space: dict[str, list[int]]) -> list[Config]:
+    """Return every combination of the knob values in `space`."""
+    values = [space[knob] for knob in KNOBS]
+    return [tuple(zip(KNOBS, combo)) for combo in itertools.product(*values)]
+
+
+def random_configs(
+    space: dict[str, list[int]], samples: int, rng: random.Random
+) -> list[Config]:
+    """Return `samples` distinct combinations of the knob values, drawn at random."""
+    configs = grid_configs(space)
+    return rng.sample(configs, min(samples, len(configs)))
+
+
+def successive_halving(
+    configs: list[Config],
+    seeds: list[int],
+    cache: ResultCache,
+    pool: Executor | None,
+    workers: int = 1,
+    min_seeds: int = 4,
+    eta: int = 3,
+) -> dict[Config, list[float]]:
+    """Return the margins of the configurations left after successive halving.
+
+    The survivors of each round play `eta` times as many seeds as the round before,
+    and the best `1 / eta` of them go on.
+    """
+    used = min(min_seeds, len(seeds))
+    while True:
+        margins = evaluate(configs, seeds[:used], cache, pool, workers)
+        if len(configs) == 1 or used == len(seeds):
+            return margins
+        ranked = sorted(configs, key=lambda cfg: -statistics.mean(margins[cfg]))
+        configs = ranked[: max(1, math.ceil(len(configs) / eta))]
+        used = min(used * eta, len(seeds))
+
+
+def main():
+    """Sweep PlayerB's knobs from the command line and rank the configurations."""
+    parser = argparse.ArgumentParser(
+        description="sweep PlayerB's partitioning and search knobs",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--strategy", choices=("grid", "random", "halving"), default="grid"
+    )
+    parser.add_argument("-d", "--depth", type=int, nargs="+", default=[6, 8, 10, 12])
+    parser.add_argument(
+        "-k", "--partitions", type=partition_count, nargs="+", default=[2, 3, 4]
+    )
+    parser.add_argument("--overlap", type=int, nargs="+", default=[0, 1, 2])
+    parser.add_argument("--opponent", type=engine.agent_name, default="PlayerA")
+    parser.add_argument("-s", "--seeds", type=parse_seeds, default="0-31")
+    parser.add_argument("-t", "--ticks", type=int, default=engine.MAX_TICKS)
+    parser.add_argument("-n", "--size", type=int, default=env.N, help="board size N")
+    parser.add_argument("--samples", type=int, default=10, help="random configs")
+    parser.add_argument("--min-seeds", type=int, default=4, help="halving start")
+    parser.add_argument("--eta", type=int, default=3, help="halving keeps 1 / eta")
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument(
+        "--cache", default=os.path.join(CACHE_DIR, "sweep.jsonl"), help="'' to skip"
+    )
+    parser.add_argument("-o", "--output", help="write the ranking to this .json file")
+    args = parser.parse_args()
+
+    space = {
+        "search_depth": args.depth,
+        "partitions": args.partitions,
+        "partition_overlap": args.overlap,
+    }
+    context = {
+        "code": code_version(),
+        "opponent": args.opponent,
+        "ticks": args.ticks,
+        "n": args.size,
+    }
+    cache = ResultCache(args.cache or None, context)
+    played = len(cache.margins)
+
+    start = time.perf_counter()
+    workers = args.workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        if args.strategy == "halving":
+            configs = grid_configs(space)
+            margins = successive_halving(
+                configs, args.seeds, cache, pool, workers, args.min_seeds, args.eta
+            )
+        else:
+            if args.strategy == "grid":
+                configs = grid_configs(space)
+            else:
+                configs = random_configs(space, args.samples, random.Random(0))
+            margins = evaluate(configs, args.seeds, cache, pool, workers)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    elapsed = time.perf_counter() - start
+
+    ranking = sorted(
+        (
+            {
+                **dict(config),
+                "seeds": len(values),
+                "mean_margin": statistics.mean(values),
+                "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+            }
+            for config, values in margins.items()
+        ),
+        key=lambda row: -row["mean_margin"],
+    )
+    print(
+        f"{'depth':>6}{'parts':>6}{'overlap':>8}{'seeds':>7}{'margin':>9}{'stdev':>8}"
+    )
+    for row in ranking:
+        print(
+            f"{row['search_depth']:>6}{row['partitions']:>6}"
+            f"{row['partition_overlap']:>8}{row['seeds']:>7}"
+            f"{row['mean_margin']:>9.2f}{row['stdev']:>8.2f}"
+        )
+    print(
+        f"\n{len(cache.margins) - played} new results in {elapsed:.2f}s "
+        f"vs {args.opponent}",
+        file=sys.stderr,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            json.dump({**context, "ranking": ranking}, out, indent=2)
+            out.write("\n")
+
+
+if __name__ == "__main__":
+    main()
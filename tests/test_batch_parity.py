@@ -0,0 +1,17 @@
+"""BatchEnv must replay sprite-engine matches tick for tick."""
+
+import pytest
+
+import env
+from batch_env import check_parity
+
+
+@pytest.fixture
+def default_world():
+    """Regenerate the default world after `check_parity` reseeds it."""
+    yield env.world
+    env.generate_world(env.SEED)
+
+
+def test_parity_on_fixed_seeds(default_world):  # pylint: disable=unused-argument
+    assert check_parity([0, 1, 7, 42, 255]) == []
@@ -0,0 +1,16 @@
+"""Paired comparisons must sign each match by its slot order."""
+
+from benchmark import compare
+
+
+def test_agent_against_itself_differs_by_nothing():
+    (look, diffs), *_ = compare(("PlayerA", "PlayerA"), max_runs=4, batch=4, workers=1)
+    assert diffs == [0, 0, 0, 0]
+    assert look.mean_diff == 0
+
+
+def test_swapped_pairing_negates_the_differences():
+    pairing = ("PlayerA", "randPlayer")
+    (_, diffs), *_ = compare(pairing, max_runs=4, batch=4, workers=1)
+    (_, swapped), *_ = compare(pairing[::-1], max_runs=4, batch=4, workers=1)
+    assert diffs == [-diff for diff in swapped]
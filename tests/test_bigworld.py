@@ -0,0 +1,27 @@
+"""A coin respawned on a picked-up cell must get its own deadline."""
+
+import numpy as np
+
+from batch_env import STAY
+from bigworld import ChunkedWorld, random_starts
+
+
+def test_respawn_after_pickup_uses_the_new_deadline():
+    start = random_starts(0, 64, 64, 1)[0]
+    world = ChunkedWorld(0, 64, [start])
+    chunk = world.chunks[world.chunk_of(start)]
+    local = tuple(start - chunk.origin)
+    flat = np.ravel_multi_index(local, chunk.value.shape)
+    free = chunk.free
+
+    # a coin with a deadline later than any spawn can draw, and no other spawns
+    chunk.free = free[:0]
+    chunk.value[local] = 5
+    chunk.expire[local] = world.tick + 10 * world.expire_ticks
+    chunk.count += 1
+    assert world.step([STAY]).tolist() == [5]
+
+    chunk.free = free[free == flat]
+    chunk.step(world.tick + 1, world.expire_ticks)
+    assert chunk.value[local] > 0
+    assert chunk.expire[local] <= world.tick + 1 + 4 * world.expire_ticks
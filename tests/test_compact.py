@@ -0,0 +1,51 @@
+"""Compact worlds must play exactly like sprite worlds."""
+
+import random
+
+import pytest
+
+import engine
+import env
+
+
+def play(seed, compact, pairing, ticks=600):
+    """Play a match and return its scores, coin events and per-tick coin index."""
+    world = env.Environment(env.WorldConfig(seed, compact=compact))
+    events = []
+    world.coins.listeners.append(
+        lambda change, coin: events.append((change, coin.cell, coin.value))
+    )
+    random.seed(seed)
+    agents = [engine.AGENTS[name](slot, world) for slot, name in enumerate(pairing)]
+    states = []
+
+    def record(_tick):
+        coins = world.coins
+        states.append(
+            (list(coins.by_pos.items()), coins.expiry_grid.tobytes(), len(coins))
+        )
+
+    scores = engine.run_game(agents, ticks, record, world)
+    return scores, events, states
+
+
+@pytest.mark.parametrize("seed", [0, 5, 11])
+@pytest.mark.parametrize("pairing", [("PlayerA", "PlayerB"), ("randPlayer",) * 2])
+def test_compact_matches_sprite_world(seed, pairing):
+    assert play(seed, True, pairing) == play(seed, False, pairing)
+
+
+def test_table_expires_and_compacts():
+    now = [0]
+    table = env.CoinTable(5, lambda: now[0])
+    deadlines = []
+    for idx in range(200):
+        table.spawn(idx % 5, idx // 5 % 5, 1 + idx % 9, 1 + idx % 4)
+        deadlines.append(now[0] + (1 + idx % 4) * 1000)
+        now[0] += 100
+        table.expire(now[0])
+
+    live = sorted(deadline for deadline in deadlines if deadline >= now[0])
+    assert sorted(coin.expires_at for coin in table) == live
+    assert len(table.x) < 100  # expired rows were compacted away, not kept
+    assert [coin.number for coin in table] == sorted(coin.number for coin in table)
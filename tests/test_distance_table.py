@@ -0,0 +1,28 @@
+"""DistanceTable.cached must survive bad cache files and stay bounded."""
+
+import os
+
+import env
+from distance_table import DistanceTable
+
+
+def test_truncated_file_is_a_cache_miss(tmp_path, monkeypatch):
+    monkeypatch.setattr(DistanceTable, "_loaded", DistanceTable._loaded.copy())
+    grid = env.Environment(env.WorldConfig(3)).wall_grid
+    table = DistanceTable.cached(grid, str(tmp_path))
+    (path,) = tmp_path.iterdir()
+    path.write_bytes(path.read_bytes()[:100])
+
+    DistanceTable._loaded.clear()
+    rebuilt = DistanceTable.cached(grid, str(tmp_path))
+    assert (rebuilt.dist == table.dist).all()
+    assert os.listdir(tmp_path) == [path.name]
+
+
+def test_memory_holds_at_most_max_loaded(monkeypatch):
+    monkeypatch.setattr(DistanceTable, "_loaded", DistanceTable._loaded.copy())
+    monkeypatch.setattr(DistanceTable, "MAX_LOADED", 2)
+    DistanceTable._loaded.clear()
+    for seed in range(4):
+        DistanceTable.cached(env.Environment(env.WorldConfig(seed)).wall_grid, None)
+    assert len(DistanceTable._loaded) == 2
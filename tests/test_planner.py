@@ -0,0 +1,13 @@
+"""A planner's process pool must not outlive its match."""
+
+import engine
+import env
+from planner import RolloutPlanner
+
+
+def test_run_game_closes_the_planner_pool():
+    world = env.Environment(env.WorldConfig(0))
+    planner = RolloutPlanner(world=world, workers=2)
+    engine.run_match(planner, engine.AGENTS["PlayerA"](1, world), 3, world=world)
+    assert planner.rollouts_played
+    assert planner.pool is None
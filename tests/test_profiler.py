@@ -0,0 +1,42 @@
+"""Budgeted matches must play to the end whatever the agents' latency."""
+
+import random
+
+import pytest
+
+import engine
+import env
+from compAgent import PlayerA, PlayerB
+from profiler import AgentProfiler
+
+TICKS = 3000
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_budgeted_match_runs_to_the_end(seed):
+    world = env.Environment(env.WorldConfig(seed))
+    random.seed(1)
+    agents = [PlayerA(world=world), PlayerB(world=world)]
+    profiler = AgentProfiler(agents, 0.05)
+    engine.run_match(*agents, TICKS, world=world)
+    profiler.detach()
+
+    for prof in profiler.summary():
+        assert prof.calls == TICKS
+
+
+def test_zero_budget_forfeits_every_move():
+    world = env.Environment(env.WorldConfig(0))
+    random.seed(1)
+    agents = [PlayerA(world=world), PlayerB(world=world)]
+    starts = [plr.rect.topleft for plr in agents]
+    profiler = AgentProfiler(agents, 0)
+    engine.run_match(*agents, 200, world=world)
+    profiler.detach()
+
+    assert [plr.rect.topleft for plr in agents] == starts
+    assert [plr.steps for plr in agents] == [0, 0]
+    assert [prof.forfeits for prof in profiler.summary()] == [200, 200]
+    # the budget reaches the searches, which give up instead of running on
+    assert all(plr.search.timeouts for plr in agents)
+    assert all(plr.search.stop_ns is None for plr in agents)
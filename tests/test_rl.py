@@ -0,0 +1,15 @@
+"""QAgent must play, untrained, when no Q-table has been saved."""
+
+import pytest
+
+import engine
+import env
+from rl import QAgent
+
+
+def test_missing_table_plays_untrained(tmp_path):
+    world = env.Environment(env.WorldConfig(0))
+    with pytest.warns(UserWarning, match="untrained"):
+        agent = QAgent(str(tmp_path / "qtable.npz"), world)
+    assert agent.table.steps == 0
+    engine.run_match(agent, engine.AGENTS["PlayerB"](1, world), 50, world=world)
@@ -0,0 +1,32 @@
+"""PathCache bookkeeping and GridSearch deadlines."""
+
+import env
+from distance_table import UNREACHABLE
+from search import GridSearch, PathCache, SearchResult
+
+
+def test_remove_tolerates_a_missing_goal_index():
+    cache = PathCache()
+    cache.put((0, 0), None, SearchResult((0, 2), [(0, 1), (0, 2)], 2))
+    cache._by_goal.clear()  # pylint: disable=protected-access
+
+    cache.drop_closer((0, 1))
+    cache.put((0, 0), None, SearchResult((1, 0), [(1, 0)], 1))
+    cache.drop_goal((1, 0))
+
+    assert cache.get((0, 0)) is None
+
+
+def test_searches_past_the_deadline_find_nothing():
+    world = env.Environment(env.WorldConfig(0))
+    search = GridSearch(world.wall_grid)
+    goal = (world.n - 1, world.n - 1)
+    search.stop_ns = 0
+
+    assert search.bfs((0, 0), [goal]).goal is None
+    assert (search.distance_field((0, 0), [goal]) == UNREACHABLE).all()
+    assert search.path_to(goal) == []
+    assert search.timeouts == 2
+
+    search.stop_ns = None
+    assert search.bfs((0, 0), [goal]).goal == goal
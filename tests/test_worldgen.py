@@ -0,0 +1,39 @@
+"""CoinSchedule must hand out coins in the legacy `coin_arr` order."""
+
+import numpy as np
+import pytest
+
+import env
+from worldgen import CoinSchedule
+
+
+def legacy_coin_arr(seed, n, coinnum):
+    """Build the spawn list like the original env.py did."""
+    np.random.seed(seed)
+    coin_pos = np.random.randint(0, n, size=(coinnum, 2))
+    coin_val = np.random.randint(1, 10, size=(coinnum, 1))
+    coin_life = np.random.randint(1, 5, size=(coinnum, 1))
+    coin_arr = np.concatenate((coin_pos, coin_val, coin_life), axis=1)
+    return coin_arr.tolist()
+
+
+@pytest.mark.parametrize("seed", [0, 1, 42])
+def test_pop_matches_legacy_order(seed):
+    schedule = CoinSchedule(seed, env.N, env.COINNUM)
+    coin_arr = legacy_coin_arr(seed, env.N, env.COINNUM)
+    assert [schedule.pop() for _ in range(env.COINNUM)] == coin_arr
+
+
+def test_schedule_continues_across_blocks():
+    schedule = CoinSchedule(3, env.N, 7)
+    assert [schedule.pop() for _ in range(7)] == legacy_coin_arr(3, env.N, 7)
+
+    ahead = schedule.upcoming(25)  # spans four more blocks
+    assert ahead.shape == (25, 4)
+    assert schedule.peek() == ahead[0].tolist()
+    popped = [schedule.pop() for _ in range(25)]
+    assert popped == ahead.tolist()
+    assert schedule.spawned == 32
+
+    schedule.rewind()
+    assert [schedule.pop() for _ in range(32)][7:] == popped
@@ -0,0 +1,179 @@
+"""tournament.py: Play many headless matches in parallel across all cores."""
+
+import argparse
+import csv
+import dataclasses
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+import engine
+import env
+
+Pairing = tuple[str, str]
+
+
+@dataclass(frozen=True)
+class MatchResult:
+    """Outcome of one headless match."""
+
+    seed: int
+    player1: str
+    player2: str
+    score1: int
+    score2: int
+    ticks: int
+    seconds: float
+    n: int = env.N
+
+    @property
+    def winner(self) -> int:
+        """Return the winning slot (1 or 2), or 0 for a draw."""
+        if self.score1 == self.score2:
+            return 0
+        return 1 if self.score1 > self.score2 else 2
+
+
+# Worlds built by this process, by board size; reused from match to match.
+_worlds: dict[int, env.Environment] = {}
+
+
+def world_for(seed: int, n: int) -> env.Environment:
+    """Return this process's compact world of size `n`, generated from `seed`."""
+    world = _worlds.get(n)
+    if world is None:
+        world = _worlds[n] = env.Environment(env.WorldConfig(seed, n, compact=True))
+    elif world.seed != seed:
+        world.generate(seed)
+    return world
+
+
+def play(
+    seed: int, pairing: Pairing, ticks: int = engine.MAX_TICKS, n: int = env.N
+) -> MatchResult:
+    """Play `pairing` on the `n` x `n` world generated from `seed`.
+
+    The worker process keeps its worlds and only regenerates them, so each match
+    skips pygame start-up and asset loading.
+    """
+    start = time.perf_counter()
+    world = world_for(seed, n)
+    random.seed(seed)
+    player1 = engine.AGENTS[pairing[0]](0, world)
+    player2 = engine.AGENTS[pairing[1]](1, world)
+    score1, score2 = engine.run_match(player1, player2, ticks, world=world)
+    return MatchResult(
+        seed, *pairing, score1, score2, ticks, time.perf_counter() - start, n
+    )
+
+
+def _play_task(task: tuple[int, Pairing, int, int]) -> MatchResult:
+    """Unpack a task for `ProcessPoolExecutor.map`."""
+    return play(*task)
+
+
+def run_tournament(
+    seeds: Iterable[int],
+    pairings: Iterable[Pairing],
+    ticks: int = engine.MAX_TICKS,
+    workers: int | None = None,
+    n: int = env.N,
+) -> Iterator[MatchResult]:
+    """Yield a result for every (seed, pairing) combination, in task order."""
+    tasks = [(seed, pairing, ticks, n) for pairing in pairings for seed in seeds]
+    if workers == 1:
+        yield from map(_play_task, tasks)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_play_task, tasks, chunksize=chunksize)
+
+
+def parse_seeds(spec: str) -> list[int]:
+    """Parse seeds such as `0-999`, `3,5,8` or `0-9,100`."""
+    seeds: list[int] = []
+    for part in spec.split(","):
+        if "-" in part[1:]:
+            first, last = part.split("-", 1)
+            seeds.extend(range(int(first), int(last) + 1))
+        else:
+            seeds.append(int(part))
+    return seeds
+
+
+def parse_pairing(spec: str) -> Pairing:
+    """Parse a pairing such as `PlayerA:PlayerB`."""
+    player1, sep, player2 = spec.partition(":")
+    if not sep or player1 not in engine.AGENTS or player2 not in engine.AGENTS:
+        raise argparse.ArgumentTypeError(
+            f"expected AGENT:AGENT with agents from {sorted(engine.AGENTS)}"
+        )
+    return player1, player2
+
+
+def write_results(results: list[MatchResult], path: str):
+    """Write results as CSV or JSON lines, chosen by the file extension."""
+    with open(path, "w", newline="", encoding="utf-8") as out:
+        if path.endswith(".csv"):
+            fields = [field.name for field in dataclasses.fields(MatchResult)]
+            writer = csv.DictWriter(out, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(dataclasses.asdict(res) for res in results)
+        else:
+            for res in results:
+                out.write(json.dumps(dataclasses.asdict(res)) + "\n")
+
+
+def main():
+    """Run a tournament from the command line and print a summary per pairing."""
+    parser = argparse.ArgumentParser(
+        description="parallel headless tileworld tournament",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("-s", "--seeds", type=parse_seeds, default="0-99")
+    parser.add_argument(
+        "-p",
+        "--pairings",
+        type=parse_pairing,
+        nargs="+",
+        default=[("PlayerA", "PlayerB")],
+    )
+    parser.add_argument("-t", "--ticks", type=int, default=engine.MAX_TICKS)
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("-n", "--size", type=int, default=env.N, help="board size N")
+    parser.add_argument("-o", "--output", help="write results to .csv or .jsonl")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = list(
+        run_tournament(args.seeds, args.pairings, args.ticks, args.workers, args.size)
+    )
+    elapsed = time.perf_counter() - start
+
+    if args.output:
+        write_results(results, args.output)
+
+    for pairing in args.pairings:
+        played = [res for res in results if (res.player1, res.player2) == pairing]
+        print(f"{pairing[0]} vs {pairing[1]} ({len(played)} matches):")
+        for slot, name in enumerate(pairing, start=1):
+            scores = [res.score1 if slot == 1 else res.score2 for res in played]
+            wins = sum(res.winner == slot for res in played)
+            print(
+                f"  Player {slot} ({name}): wins {wins}, "
+                f"mean {statistics.mean(scores):.2f}, "
+                f"median {statistics.median(scores)}"
+            )
+    print(f"\n{len(results)} matches in {elapsed:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
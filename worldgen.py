@@ -0,0 +1,104 @@
+"""worldgen.py: Seeded generation of walls, coins and random agent paths.
+
+These are the formulas `env.py` uses to build a world. They only need NumPy, so
+batched and headless simulators can reproduce a world without pygame.
+"""
+
+import numpy as np
+
+
+def wall_positions(seed: int, n: int, wallnum: int) -> np.ndarray:
+    """Return `wallnum` wall cells as an array of (x, y) rows."""
+    np.random.seed(seed)
+    return np.random.randint(1, n - 1, size=(wallnum, 2))
+
+
+def random_agent_paths(seed: int, stepnum: int) -> tuple[np.ndarray, np.ndarray]:
+    """Return the move sequences followed by the two random agents.
+
+    The moves (0-3) are drawn as after `np.random.seed(seed)` and `seed + 200`, but
+    from their own generators, and stored as int8.
+    """
+    path = np.random.RandomState(seed).randint(4, size=stepnum * 10)
+    path1 = np.random.RandomState(seed + 200).randint(4, size=stepnum * 10)
+    return path.astype(np.int8), path1.astype(np.int8)
+
+
+def coin_schedule(seed: int, n: int, coinnum: int) -> np.ndarray:
+    """Return the coin spawn order as rows of (x, y, value, lifespan in seconds)."""
+    np.random.seed(seed)
+    coin_pos = np.random.randint(0, n, size=(coinnum, 2))
+    coin_val = np.random.randint(1, 10, size=(coinnum, 1))
+    coin_life = np.random.randint(1, 5, size=(coinnum, 1))
+    return np.concatenate((coin_pos, coin_val, coin_life), axis=1)
+
+
+class CoinSchedule:
+    """Cursor over the seeded coin spawn order.
+
+    The first `coinnum` coins are exactly `coin_schedule(seed, n, coinnum)`, stored
+    as one contiguous array, so taking the next coin is O(1). A match that outlives
+    them continues with further blocks drawn from a generator seeded by
+    (seed, block), instead of running out.
+    """
+
+    def __init__(self, seed: int, n: int, coinnum: int):
+        """Generate the first block of the schedule."""
+        self.seed = seed
+        self.n = n
+        self.coinnum = coinnum
+        dtype = np.int8 if n < 128 else np.int32
+        self.blocks = [coin_schedule(seed, n, coinnum).astype(dtype)]
+        self.rewind()
+
+    def rewind(self):
+        """Start again from the first coin."""
+        self.block = 0
+        self.cursor = 0
+
+    def _block(self, index: int) -> np.ndarray:
+        """Return block `index` of the schedule, generating blocks up to it."""
+        while len(self.blocks) <= index:
+            rng = np.random.default_rng((self.seed, len(self.blocks)))
+            rows = np.empty_like(self.blocks[0])
+            rows[:, :2] = rng.integers(0, self.n, size=(self.coinnum, 2))
+            rows[:, 2] = rng.integers(1, 10, size=self.coinnum)
+            rows[:, 3] = rng.integers(1, 5, size=self.coinnum)
+            self.blocks.append(rows)
+        return self.blocks[index]
+
+    def _next_block(self) -> np.ndarray:
+        """Return the block after the current one, generating it if needed."""
+        return self._block(self.block + 1)
+
+    def peek(self) -> list[int]:
+        """Return the next coin as [x, y, value, lifespan] without taking it."""
+        if self.cursor == self.coinnum:
+            return self._next_block()[0].tolist()
+        return self.blocks[self.block][self.cursor].tolist()
+
+    def upcoming(self, count: int) -> np.ndarray:
+        """Return the next `count` coins as rows of the schedule without taking them."""
+        parts = [self.blocks[self.block][self.cursor : self.cursor + count]]
+        missing = count - len(parts[0])
+        block = self.block + 1
+        while missing > 0:
+            parts.append(self._block(block)[:missing])
+            missing -= len(parts[-1])
+            block += 1
+        return np.concatenate(parts)
+
+    def pop(self) -> list[int]:
+        """Take the next coin as [x, y, value, lifespan]."""
+        if self.cursor == self.coinnum:
+            self._next_block()
+            self.block += 1
+            self.cursor = 0
+        row = self.blocks[self.block][self.cursor].tolist()
+        self.cursor += 1
+        return row
+
+    @property
+    def spawned(self) -> int:
+        """Return how many coins have been taken since the last rewind."""
+        return self.block * self.coinnum + self.cursor